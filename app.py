@@ -1,44 +1,27 @@
 # -*- coding: utf-8 -*-
 # app.py
 
+import json, time
+T_START = time.perf_counter()
+
 import streamlit as st
 import pandas as pd
 import numpy as np
-import regex, re, unicodedata
-import matplotlib.pyplot as plt
-from wordcloud import WordCloud
-from deep_translator import GoogleTranslator
-import spacy, spacy.cli
-import spacy
-import scipy.sparse as sp
-import spacy
-from spacy.cli import download as spacy_download
-import spacy.cli
-try:
-    spacy.load("en_core_web_sm")
-except OSError:
-    spacy.cli.download("en_core_web_sm")
-
-
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-from sklearn.model_selection import train_test_split
-from imblearn.over_sampling import SMOTE
-from sklearn.linear_model import LogisticRegression
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.svm import SVC
-from xgboost import XGBClassifier
-from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, roc_auc_score, RocCurveDisplay, ConfusionMatrixDisplay
-
-from gensim import corpora, models, similarities
-from gensim.models import Word2Vec, FastText
-
-from pyspark.sql import SparkSession
-from pyspark.sql.functions import col
-from pyspark.ml.feature import RegexTokenizer, StopWordsRemover, HashingTF, IDF
-from pyspark.ml import Pipeline
-from pyspark.ml.evaluation import BinaryClassificationEvaluator, MulticlassClassificationEvaluator
-from pyspark.ml.classification import LogisticRegression as SparkLR, DecisionTreeClassifier as SparkDT, RandomForestClassifier as SparkRF
+
+# Only light modules at the top: spaCy, gensim, scikit-learn, XGBoost, PySpark,
+# matplotlib and wordcloud are imported on the pages that use them (timed as
+# "import: …" stages), so the Upload page and every rerun stay cheap.
+import ingest
+import profiling
+from ingest import file_digest
+from profiling import Profiler
+from text_clean import clean_series, load_nlp, stop_words
+from translation_cache import TranslationCache, cached_translator, make_backend
+
+TRAIN_WORKERS = None          # None → one process per model, capped at os.cpu_count()
+REGISTRY_KEEP = 8             # bundles kept by the sidebar "Dọn registry" button
+T_IMPORTS     = time.perf_counter() - T_START
+
 
 # ─── Page config & Sidebar ─────────────────────────────────────────────────────
 st.set_page_config(page_title="ITViec Explorer", layout="wide")
@@ -56,6 +39,35 @@ with st.sidebar:
     st.markdown("- Phạm Đức Huy (DucHuyUFM@gmail.com)")
     st.markdown("**GVHD:** Ms. Khuất Thùy Phương")
     st.markdown("Đồ án Tốt nghiệp  \nData Science & ML  \nTTTH - ĐH KHTN")
+    st.markdown("---")
+    show_diag = st.checkbox("🩺 Diagnostics", value=False)
+    DIAG      = st.empty()
+
+# ─── Profiling ─────────────────────────────────────────────────────────────────
+# One Profiler per browser session; every rerun is a new run id. Library modules
+# record their own stages (ingest, clean, translate, sim, features, spark).
+PROF = profiling.activate(st.session_state.setdefault("profiler", Profiler()))
+PROF.begin_run()
+PROF.add("import: app", wall_s=T_IMPORTS)
+
+def render_diagnostics():
+    if not show_diag:
+        return
+    with DIAG.container():
+        recs = sorted(PROF.last_run(), key=lambda r: r["start"])
+        df_p = pd.DataFrame(recs).reindex(columns=["stage","wall_s","cpu_s","peak_mb","cache","status"])
+        df_p["stage"] = ["· " * d + s for d, s in zip([r["depth"] for r in recs], df_p["stage"])]
+        st.caption(f"Run #{PROF.run} · script {time.perf_counter() - T_START:.2f}s · "
+                   f"imports {sum(r.get('wall_s') or 0 for r in recs if r['stage'].startswith('import:')):.2f}s")
+        st.dataframe(df_p.style.format({"wall_s":"{:.3f}","cpu_s":"{:.3f}","peak_mb":"{:,.1f}"}, na_rep="–"),
+                     use_container_width=True)
+        st.download_button("⬇️ JSONL", PROF.jsonl(), "profile.jsonl", "application/json")
+        st.download_button("⬇️ Chrome trace", json.dumps(PROF.chrome_trace(), default=str),
+                           "trace.json", "application/json")
+
+def end_page():
+    render_diagnostics()
+    st.stop()
 
 # ─── 1) Introduction (always visible) ─────────────────────────────────────────
 st.header("📝 Giới thiệu")
@@ -70,33 +82,33 @@ st.markdown("""
 2. **Recommendation Classification** (Scikit-Learn: LR, RF, SVM, XGB; PySpark: LR, DT, RF; interactive)
 """)
 
-# ─── 2) Text tools & clean_text ─────────────────────────────────────────────────
-@st.cache_data
-def init_text_tools():
-    tr = GoogleTranslator(source="auto", target="en")
-    try:
-        nlp = spacy.load("en_core_web_sm", disable=["parser","ner"])
-    except OSError:
-        spacy_download("en_core_web_sm")
-        nlp = spacy.load("en_core_web_sm", disable=["parser","ner"])
-    sw  = spacy.lang.en.stop_words.STOP_WORDS
-    vn  = re.compile(r"[àáảãạăắằẳẵặâấầẩẫậđèéẻẽẹêếềểễệìíỉĩịòóỏõọôốồổỗơớờởỡợùúủũụưứừửữựỳỷỹự]", re.IGNORECASE)
-    return tr, nlp, sw, vn
-
-translator, nlp, EN_SW, VIET_REGEX = init_text_tools()
-
-@st.cache_data
-def clean_text(txt: str) -> str:
-    s = str(txt).strip()
-    if VIET_REGEX.search(s):
-        try: s = translator.translate(s)
-        except: pass
-    s = unicodedata.normalize("NFD", s)
-    s = regex.sub(r"\p{Mn}", "", s)
-    s = re.sub(r"[^A-Za-z\s]", " ", s).lower()
-    toks = [w for w in re.findall(r"\b\w\w+\b", s) if w not in EN_SW]
-    doc  = nlp(" ".join(toks))
-    return " ".join(tok.text for tok in doc if tok.pos_ in {"NOUN","VERB","ADJ","ADV"})
+# ─── 2) Text tools & batched cleaning ───────────────────────────────────────────
+CLEAN_BATCH = 1000   # nlp.pipe batch_size
+CLEAN_PROCS = 1      # nlp.pipe n_process
+
+@st.cache_resource
+def get_translator():
+    tr = make_backend()                        # ITVIEC_TRANSLATOR=offline → no network
+    tc = TranslationCache()                    # .cache/translations.sqlite
+    return tr, tc
+
+@st.cache_resource(show_spinner="Đang tải spaCy…")
+def get_nlp():
+    # process-wide; only loaded when some text actually has to be cleaned
+    profiling.miss()
+    with profiling.stage("import: spacy"):
+        try:
+            return load_nlp("en_core_web_sm"), stop_words()
+        except OSError as e:
+            st.error(str(e))
+            st.stop()
+
+def clean_column(texts):
+    with profiling.stage("nlp", cache=True):
+        nlp, sw = get_nlp()
+    translator, tr_cache = get_translator()
+    return clean_series(texts, nlp, sw, translate=cached_translator(tr_cache, translator),
+                        batch_size=CLEAN_BATCH, n_process=CLEAN_PROCS)
 
 # ─── 3) Upload Data ─────────────────────────────────────────────────────────────
 if menu == "🗂 Upload Data":
@@ -125,47 +137,24 @@ if menu == "🗂 Upload Data":
                 st.success("✅ Đã upload CSV & XLSX.")
     else:
         st.info("✅ Dữ liệu đã sẵn sàng trong session.")
-    st.stop()
+    end_page()
 
 # ─── 4) Load & Preprocess ───────────────────────────────────────────────────────
+# Uploads are fingerprinted by content; each file is parsed once into typed
+# Parquet under .cache/ingest, so the cache key here is the digests rather than
+# the UploadedFile objects. Source A is diffed against the last ingested state
+# and only new/changed rows go through clean_column.
 @st.cache_data
-def load_all(src, comp_fp, map_fp, rev_fp_or_all_fp):
-    if src == "A":
-        df_comp = pd.read_excel(comp_fp)
-        df_map  = pd.read_excel(map_fp)
-        df_rev  = pd.read_excel(rev_fp_or_all_fp)
-        df_comp["Clean_desc"] = df_comp["Company overview"].fillna("").map(clean_text)
-        df_rev["Clean_rev"]   = (
-            df_rev["What I liked"].fillna("") + " " +
-            df_rev["Suggestions for improvement"].fillna("")
-        ).map(clean_text)
-        df_all = (
-            df_map
-            .merge(df_rev, on="id", how="inner")
-            .merge(df_comp[["id","Company Name","Clean_desc"]], on="id", how="inner")
-        )
-    else:
-        # src == "B"
-        df_comp = pd.read_csv(comp_fp)
-        df_map  = pd.read_excel(map_fp)
-        df_all  = pd.read_csv(rev_fp_or_all_fp)
-        df_comp["Clean_desc"] = df_comp["Clean_desc"].fillna("")
-        df_all["Clean_rev"]   = df_all["Clean_rev"].fillna("")
-
-    # numeric ratings
-    df_map_num = df_map.select_dtypes(include="number").fillna(0).copy()
-    df_map_num["id"] = df_map["id"]
-
-    # merge overview, reviews, ratings
-    df_all = (
-        df_all
-        .merge(df_map_num, on="id", how="left")
-        .merge(df_comp[["id","Company Name","Clean_desc"]], on="id", how="left")
-    )
-    df_all["Clean_rev"] = df_all["Clean_rev"].fillna("")
-    df_all["Label"]     = (df_all["Recommend?"].str.lower() == "yes").astype(int)
+def load_all(src, digests, _comp_fp, _map_fp, _rev_fp_or_all_fp):
+    profiling.miss()
+    return ingest.load_all(src, _comp_fp, _map_fp, _rev_fp_or_all_fp, clean_column, digests=digests)
 
-    return df_comp, df_map_num, df_all
+@st.cache_data(max_entries=16)
+def upload_digest(name, size, file_id, _fp):
+    return file_digest(_fp)
+
+def digest_of(fp):
+    return upload_digest(getattr(fp, "name", ""), getattr(fp, "size", 0), getattr(fp, "file_id", id(fp)), fp)
 
 # Thay vì load_all(st.session_state), gọi:
 src = st.session_state["src"]         # hoặc "A"/"B"
@@ -173,18 +162,40 @@ fp1 = st.session_state["comp_fp"]
 fp2 = st.session_state["map_fp"]
 fp3 = st.session_state["rev_fp"] if src=="A" else st.session_state["all_fp"]
 
-df_comp, df_map, df_all = load_all(src, fp1, fp2, fp3)
+with profiling.stage("load_all", cache=True):
+    DIGESTS = tuple(map(digest_of, (fp1, fp2, fp3)))
+    df_comp, df_map, df_all, clean_stats, delta = load_all(src, DIGESTS, fp1, fp2, fp3)
+if delta is not None and delta.changed:
+    st.sidebar.caption(f"♻️ Re-ingest: {delta.summary()}")
+    if delta.stale:
+        st.sidebar.caption("Cần build lại: " + ", ".join(delta.stale))
+if clean_stats.n_docs:
+    st.sidebar.caption(
+        f"🧹 Clean: {clean_stats.n_docs:,} docs ({clean_stats.n_unique:,} unique) "
+        f"in {clean_stats.seconds:.1f}s · {clean_stats.docs_per_sec:,.0f} docs/s"
+    )
+translator, TR_CACHE = get_translator()
+tr_stats = TR_CACHE.stats
+if tr_stats.hits or tr_stats.misses:
+    st.sidebar.caption(
+        f"🌐 Translate ({translator.name}): {tr_stats.hits:,} hit · {tr_stats.misses:,} miss"
+        + (f" · {tr_stats.failed:,} failed" if tr_stats.failed else "")
+    )
+st.sidebar.caption(f"💾 Dữ liệu: {len(df_all):,} reviews · {ingest.memory_mb(df_comp, df_map, df_all):,.1f} MB")
 COMP_NAMES = df_comp["Company Name"].tolist()
 
 # ─── 5) EDA & WordCloud ────────────────────────────────────────────────────────
 if menu == "📊 EDA & WordCloud":
+    with profiling.stage("import: eda"):
+        from wordcloud import WordCloud
     st.header("2️⃣ EDA & WordCloud")
     t1,t2,t3 = st.tabs(["Companies","Numeric Ratings","Reviews"])
     with t1:
         st.subheader("Companies")
         st.dataframe(df_comp)
-        txt = " ".join(df_comp["Clean_desc"])
-        st.image(WordCloud(width=600,height=400).generate(txt).to_array(), use_column_width=True)
+        with profiling.stage("wordcloud: overview"):
+            txt = " ".join(df_comp["Clean_desc"])
+            st.image(WordCloud(width=600,height=400).generate(txt).to_array(), use_column_width=True)
     with t2:
         st.subheader("Numeric Ratings")
         st.dataframe(df_map)
@@ -192,206 +203,198 @@ if menu == "📊 EDA & WordCloud":
     with t3:
         st.subheader("Reviews")
         st.dataframe(df_all[["Clean_rev","Recommend?","Label"]])
-        txt2 = " ".join(df_all["Clean_rev"])
-        st.image(WordCloud(width=600,height=400).generate(txt2).to_array(), use_column_width=True)
-    st.stop()
+        with profiling.stage("wordcloud: reviews"):
+            txt2 = " ".join(df_all["Clean_rev"])
+            st.image(WordCloud(width=600,height=400).generate(txt2).to_array(), use_column_width=True)
+    end_page()
 
 # ─── 6) Similarity Search ──────────────────────────────────────────────────────
+if menu == "🔍 Similarity Search":
+    with profiling.stage("import: similarity"):
+        from sim_index import METHODS, SimIndex, build_index, dataset_version
+
+@st.cache_data(max_entries=16)
+def sim_version(src, digests, _df_comp, _df_map, _df_all):
+    # hashing every Clean_rev once per upload, not on every rerun
+    return dataset_version(_df_comp, _df_map, _df_all)
+
+@st.cache_resource(show_spinner="Đang xây dựng similarity index…")
+def get_sim_index(_df_comp, _df_map, _df_all, version):
+    # fitted once per dataset version, then memory-mapped from .cache/sim_index/<version>
+    profiling.miss()
+    rev_grp = ingest.load_rev_grp(digests=DIGESTS) if src == "A" else None
+    return SimIndex.load(build_index(_df_comp, _df_map, _df_all, version=version, rev_grp=rev_grp))
+
 if menu == "🔍 Similarity Search":
     st.header("3️⃣ Similarity Search")
+    with profiling.stage("sim: index", cache=True):
+        sim = get_sim_index(df_comp, df_map, df_all, sim_version(src, DIGESTS, df_comp, df_map, df_all))
     idx = st.selectbox("Chọn công ty", range(len(COMP_NAMES)), format_func=lambda i:COMP_NAMES[i])
     cid = df_comp.at[idx,"id"]
 
-    # helper: topn table
-    def show_topn(arr, labels):
-        df = pd.DataFrame({"Company":labels,"Score":arr})
-        return df.sort_values("Score",ascending=False).iloc[1:6].style.format({"Score":"{:.2%}"})
-
-    # Numeric
-    sim_num = cosine_similarity(df_map.drop("id", axis=1).values)[idx]
-    st.subheader("• Numeric Ratings"); st.table(show_topn(sim_num,COMP_NAMES))
-
-    # Overview TF-IDF
-    tf    = TfidfVectorizer(ngram_range=(1,2),max_features=3000)
-    M_tf  = tf.fit_transform(df_comp["Clean_desc"])
-    st.subheader("• Overview TF-IDF"); st.table(show_topn(cosine_similarity(M_tf)[idx],COMP_NAMES))
-
-    # Gensim-TFIDF
-    toks = [t.split() for t in df_comp["Clean_desc"]]
-    dct  = corpora.Dictionary(toks)
-    corp_= [dct.doc2bow(t) for t in toks]
-    mgt  = models.TfidfModel(corp_)
-    idxs = similarities.MatrixSimilarity(mgt[corp_], num_features=len(dct))
-    SIM_GS = np.vstack([ idxs[mgt[corp_][i]] for i in range(len(corp_)) ])
-    st.subheader("• Overview Gensim-TFIDF"); st.table(show_topn(SIM_GS[idx],COMP_NAMES))
-
-    # Word2Vec & FastText (IDF-weighted)
-    idf = tf.idf_
-    def idf_sim(model):
-        mat=[]
-        for doc in toks:
-            vecs, ws = [], []
-            for w in doc:
-                if w in model.wv:
-                    vecs.append(model.wv[w]); ws.append(idf[tf.vocabulary_.get(w,0)])
-            mat.append(np.average(vecs,axis=0,weights=ws) if vecs else np.zeros(model.vector_size))
-        return cosine_similarity(np.vstack(mat))[idx]
-    st.subheader("• Overview Word2Vec"); st.table(show_topn(idf_sim(Word2Vec(toks,vector_size=100,window=5,min_count=2,epochs=10)),COMP_NAMES))
-    st.subheader("• Overview FastText"); st.table(show_topn(idf_sim(FastText(toks,vector_size=100,window=5,min_count=2,epochs=10)),COMP_NAMES))
-
-        # --- Reviews tương tự ---
-    # 1) Group & reindex theo df_comp["id"]
-    rev_grp = (
-        df_all
-        .groupby("id")["Clean_rev"]
-        .apply(" ".join)
-        .reindex(df_comp["id"])
-        .fillna("")
-    )
+    TOP_K   = 5
+    use_ann = st.sidebar.checkbox("ANN cho Word2Vec/FastText (hnswlib)", value=False)
 
-    # 2) Reviews TF-IDF
-    tf_r    = TfidfVectorizer(ngram_range=(1,2), max_features=3000)
-    M_rtf   = tf_r.fit_transform(rev_grp)
-    sim_rtf = cosine_similarity(M_rtf)[idx]
-    st.subheader("• Reviews TF-IDF")
-    df_rtf  = pd.DataFrame({"Company":COMP_NAMES, "Score":sim_rtf}).iloc[1:6]
-    st.table(df_rtf.style.format({"Score":"{:.2%}"}))
-
-    # 3) Reviews Gensim-TFIDF
-    toks_r = [doc.split() for doc in rev_grp]
-    dct_r  = corpora.Dictionary(toks_r)
-    corp_r = [dct_r.doc2bow(doc) for doc in toks_r]
-    tfidf_r= models.TfidfModel(corp_r)
-    idx_r  = similarities.MatrixSimilarity(tfidf_r[corp_r], num_features=len(dct_r))
-    GEN_rv = np.vstack([ idx_r[tfidf_r[corp_r][i]] for i in range(len(corp_r)) ])
-    sim_rgs= GEN_rv[idx]
-    st.subheader("• Reviews Gensim-TFIDF")
-    df_rgs = pd.DataFrame({"Company":COMP_NAMES, "Score":sim_rgs}).iloc[1:6]
-    st.table(df_rgs.style.format({"Score":"{:.2%}"}))
-
-    # 4) Reviews Word2Vec (IDF-weighted)
-    idf_r   = tf_r.idf_
-    w2v_r   = Word2Vec(toks_r, vector_size=100, window=5, min_count=2, epochs=10)
-    def weighted_matrix(model, docs, idf, vocab):
-        mat = []
-        for doc in docs:
-            vecs, ws = [], []
-            for w in doc:
-                if w in model.wv:
-                    vecs.append(model.wv[w])
-                    ws.append(idf[vocab.get(w,0)])
-            mat.append(np.average(vecs, axis=0, weights=ws) if vecs else np.zeros(model.vector_size))
-        return np.vstack(mat)
-    mat_w2_r = weighted_matrix(w2v_r, toks_r, idf_r, tf_r.vocabulary_)
-    sim_rw2  = cosine_similarity(mat_w2_r)[idx]
-    st.subheader("• Reviews Word2Vec")
-    df_rw2   = pd.DataFrame({"Company":COMP_NAMES, "Score":sim_rw2}).iloc[1:6]
-    st.table(df_rw2.style.format({"Score":"{:.2%}"}))
-
-    # 5) Reviews FastText (IDF-weighted)
-    ft_r     = FastText(toks_r, vector_size=100, window=5, min_count=2, epochs=10)
-    mat_ft_r = weighted_matrix(ft_r, toks_r, idf_r, tf_r.vocabulary_)
-    sim_rft  = cosine_similarity(mat_ft_r)[idx]
-    st.subheader("• Reviews FastText")
-    df_rft   = pd.DataFrame({"Company":COMP_NAMES, "Score":sim_rft}).iloc[1:6]
-    st.table(df_rft.style.format({"Score":"{:.2%}"}))
-    st.stop()
+    # helper: topn table
+    def show_topn(rows, scores):
+        df = pd.DataFrame({"Company":[COMP_NAMES[r] for r in rows],"Score":scores})
+        return df.style.format({"Score":"{:.2%}"})
+
+    for key, label in METHODS.items():
+        st.subheader(f"• {label}")
+        with profiling.stage(f"sim: query {key}", ann=use_ann):
+            top = sim.query(cid, key, TOP_K, ann=use_ann)
+        st.table(show_topn(*top))
+
+    with st.expander("⬇️ Top-k cho tất cả công ty"):
+        meth = st.selectbox("Phương pháp", list(METHODS), format_func=METHODS.get)
+        if st.button("Tính top-k"):
+            with profiling.stage(f"sim: query_all {meth}"):
+                rows, scores = sim.query_all(meth, TOP_K)
+            df_top = pd.DataFrame({
+                "Company": np.repeat(COMP_NAMES, rows.shape[1]),
+                "Rank":    np.tile(np.arange(1, rows.shape[1]+1), len(rows)),
+                "Similar": np.asarray(COMP_NAMES, dtype=object)[rows.ravel()],
+                "Score":   scores.ravel(),
+            })
+            st.download_button("Tải CSV", df_top.to_csv(index=False), f"top{TOP_K}_{meth}.csv", "text/csv")
+    end_page()
 
 # ─── 7) Recommendation Classification ─────────────────────────────────────────
 if menu == "🤖 Recommendation":
+    with profiling.stage("import: recommendation"):
+        import matplotlib.pyplot as plt
+        from sklearn.metrics import RocCurveDisplay, ConfusionMatrixDisplay
+        from features import FEATURE_PARAMS, build_features, labels, split_resample
+        from training import (FAST_MODEL_PARAMS, METRICS, MODEL_PARAMS, TIME_BUDGET, best_model, score_all,
+                              train_sk_models)
+        from model_registry import ModelRegistry, data_fingerprint, fingerprint
+        from name_index import NameIndex
+        from spark_backend import data_key as spark_data_key, train_spark_models
+        from stream_train import STREAM_MODEL_PARAMS, STREAM_PARAMS, frame_chunks, score_chunks, train_streaming
     st.header("4️⃣ Recommendation Classification")
 
-    # --- Chuẩn bị dữ liệu ---
-    tv = TfidfVectorizer(max_features=3000)
-    Xr = tv.fit_transform(df_all["Clean_rev"].fillna(""))
-    df_map_num = (
-        df_map
-        .set_index("id")
-        .select_dtypes(include="number")
-        .fillna(0)
-    )
-    num_mat = df_map_num.loc[df_all["id"]].values
-    Xn      = sp.csr_matrix(num_mat)
-    X       = sp.hstack([Xr, Xn])
-    y       = df_all["Label"]
-
-    X_tr, X_te, y_tr, y_te = train_test_split(
-        X, y, test_size=0.2, random_state=42,
-        stratify=y if y.nunique()>1 else None
-    )
-    X_res, y_res = SMOTE(random_state=42).fit_resample(X_tr, y_tr)
-
-    # --- Scikit-Learn models (cached) ---
-    @st.cache_data(show_spinner=False)
-    def train_sk_models(_X_res, _y_res, _X_te, _y_te):
-        clfs = {
-            "LR":  LogisticRegression(class_weight="balanced", max_iter=500),
-            "RF":  RandomForestClassifier(class_weight="balanced"),
-            "SVM": SVC(probability=True, class_weight="balanced"),
-            "XGB": XGBClassifier(use_label_encoder=False, eval_metric="logloss")
-        }
-        results = {}
-        for name, clf in clfs.items():
-            clf.fit(_X_res, _y_res)
-            p    = clf.predict(_X_te)
-            prob = clf.predict_proba(_X_te)[:,1]
-            results[name] = {
-                "pred": p,
-                "prob": prob,
-                "Acc":  accuracy_score(_y_te, p),
-                "Prec": precision_score(_y_te, p, zero_division=0),
-                "Rec":  recall_score(_y_te, p, zero_division=0),
-                "F1":   f1_score(_y_te, p, zero_division=0),
-                "AUC":  roc_auc_score(_y_te, prob)
-            }
-        return results
-
-    sk_res = train_sk_models(X_res, y_res, X_te, y_te)
-
-    # --- PySpark models (cached resource) ---
+    @st.cache_resource
+    def get_registry():
+        return ModelRegistry()
+
+    REGISTRY = get_registry()
+    SK_VARIANTS       = {"std": MODEL_PARAMS, "fast": FAST_MODEL_PARAMS, "stream": STREAM_MODEL_PARAMS}
+    SK_VARIANT_LABELS = {
+        "std":    "Chuẩn (TF-IDF + SMOTE)",
+        "fast":   "⚡ Fast variants (LinearSVC + calibration, XGB hist)",
+        "stream": "🌊 Streaming (hashing + partial_fit, class weights)",
+    }
+
+    # --- Scikit-Learn models (model registry) ---
+    # Trained once per (data, feature pipeline, hyperparameters) fingerprint and
+    # persisted under .cache/models/<key>; later runs only load the bundle.
+    @st.cache_resource(show_spinner="Đang train / load models…")
+    def get_sk_bundle(_df_all, _df_map, variant, key):
+        profiling.miss()
+        params = SK_VARIANTS[variant]
+        with profiling.stage("registry: load", cache=True):
+            X, bundle = None, REGISTRY.load(key)
+            if bundle is None:
+                profiling.miss()
+        if bundle is None and variant == "stream":
+            # out-of-core: hashed chunks + partial_fit, class weights instead of SMOTE
+            with profiling.stage("train_streaming", models=len(params)):
+                bundle = train_streaming(frame_chunks(_df_all, STREAM_PARAMS["chunk"]), _df_map,
+                                         STREAM_PARAMS, params)
+            REGISTRY.save(key, bundle, meta={
+                "features": {"stream": STREAM_PARAMS}, "models": params, "runs": bundle["runs"],
+                "metrics":  {nm: {m: r[m] for m in METRICS} for nm, r in bundle["results"].items()},
+            })
+        elif bundle is None:
+            X, tv, num_cols = build_features(_df_all, _df_map)
+            X_res, y_res, X_te, y_te = split_resample(X, labels(_df_all))
+            with profiling.stage("train_sk_models", models=len(params)):
+                fitted, results, runs = train_sk_models(X_res, y_res, X_te, y_te, params,
+                                                        max_workers=TRAIN_WORKERS, time_budget=TIME_BUDGET)
+                # fit / predict happen in worker processes: record what they reported
+                for nm, r in runs.items():
+                    profiling.add(f"fit: {nm}", wall_s=r.get("Fit", r["Time"]), peak_mb=r["PeakMB"],
+                                  status=r["Status"])
+                    if "Predict" in r:
+                        profiling.add(f"predict: {nm}", wall_s=r["Predict"])
+            bundle = {"vectorizer": tv, "num_cols": num_cols, "models": fitted,
+                      "results": results, "runs": runs, "y_te": y_te}
+            # a partial zoo (timeouts / errors) is shown but never persisted under this key
+            if all(r["Status"] == "ok" for r in runs.values()):
+                REGISTRY.save(key, bundle, meta={
+                    "features": FEATURE_PARAMS, "models": params, "runs": runs,
+                    "metrics":  {nm: {m: r[m] for m in METRICS} for nm, r in results.items()},
+                })
+        # best model's P(Yes) for every review, computed once per model version
+        scores = REGISTRY.load_array(key, "scores")
+        if scores is None and bundle["results"]:
+            best = bundle["models"][best_model(bundle["results"])]
+            with profiling.stage("score_all", rows=len(_df_all)):
+                if variant == "stream":
+                    scores = score_chunks(best, frame_chunks(_df_all, STREAM_PARAMS["chunk"]), _df_map,
+                                          bundle["vectorizer"], bundle["num_cols"])
+                else:
+                    if X is None:
+                        X = build_features(_df_all, _df_map, bundle["vectorizer"], bundle["num_cols"])[0]
+                    scores = score_all(best, X)
+            if REGISTRY.exists(key):
+                REGISTRY.save_array(key, "scores", scores)
+        bundle["scores"] = scores
+        return bundle
+
+    @st.cache_data(max_entries=16)
+    def data_fp_of(src, digests, _df_all, _df_map):
+        # content hash of the loaded data, once per upload rather than per keystroke
+        return data_fingerprint(_df_all, _df_map)
+
     @st.cache_resource(show_spinner=False)
-    def train_spark_models(df_all):
-        spark = SparkSession.builder.appName("itviec_cls").getOrCreate()
-        sdf = spark.createDataFrame(
-            df_all[["Clean_rev","Label"]]
-            .rename(columns={"Clean_rev":"text","Label":"label"})
-        )
-        tok  = RegexTokenizer(inputCol="text",    outputCol="words",      pattern="\\W+")
-        rem  = StopWordsRemover(inputCol="words",  outputCol="filtered")
-        htf  = HashingTF(inputCol="filtered",      outputCol="rawFeatures", numFeatures=3000)
-        idf  = IDF(inputCol="rawFeatures",         outputCol="features")
-        pipe = Pipeline(stages=[tok, rem, htf, idf])
-        data = pipe.fit(sdf).transform(sdf).select("features","label")
-        tr, te = data.randomSplit([0.8,0.2], seed=42)
-
-        ev_acc  = MulticlassClassificationEvaluator(labelCol="label", predictionCol="prediction", metricName="accuracy")
-        ev_prec = MulticlassClassificationEvaluator(labelCol="label", predictionCol="prediction", metricName="weightedPrecision")
-        ev_rec  = MulticlassClassificationEvaluator(labelCol="label", predictionCol="prediction", metricName="weightedRecall")
-        ev_f1   = MulticlassClassificationEvaluator(labelCol="label", predictionCol="prediction", metricName="f1")
-        ev_auc  = BinaryClassificationEvaluator(   labelCol="label", rawPredictionCol="probability", metricName="areaUnderROC")
-
-        models_sp = {
-            "SparkLR": SparkLR(labelCol="label", featuresCol="features"),
-            "SparkDT": SparkDT(labelCol="label", featuresCol="features"),
-            "SparkRF": SparkRF(labelCol="label", featuresCol="features")
-        }
-        sp_metrics = {}
-        sp_preds   = {}
-        for nm, est in models_sp.items():
-            m   = est.fit(tr)
-            prd = m.transform(te).withColumn("prediction", col("prediction").cast("double"))
-            sp_metrics[nm] = {
-                "Acc":  ev_acc.evaluate(prd),
-                "Prec": ev_prec.evaluate(prd),
-                "Rec":  ev_rec.evaluate(prd),
-                "F1":   ev_f1.evaluate(prd),
-                "AUC":  ev_auc.evaluate(prd)
-            }
-            sp_preds[nm] = prd.select("label","prediction","probability").toPandas()
-        spark.stop()
-        return sp_metrics, sp_preds
-
-    sp_res, sp_preds = train_spark_models(df_all)
+    def get_name_index(_df_comp, _df_all, key):
+        # key = (companies file digest, review data fingerprint): names come from df_comp
+        profiling.miss()
+        return NameIndex.from_frames(_df_comp, _df_all)
+
+    with st.sidebar:
+        variant = st.radio("Chế độ train", list(SK_VARIANT_LABELS), format_func=SK_VARIANT_LABELS.get)
+    data_fp   = data_fp_of(src, DIGESTS, df_all, df_map)
+    sk_keys   = {v: fingerprint(data_fp, {"stream": STREAM_PARAMS} if v == "stream" else FEATURE_PARAMS, prm)
+                 for v, prm in SK_VARIANTS.items()}
+    sk_key    = sk_keys[variant]
+    with st.sidebar:
+        st.caption(f"🗃 Model registry: `{sk_key}`" + (" (cached)" if REGISTRY.exists(sk_key) else ""))
+        if st.button("🗑 Xoá model cache"):
+            REGISTRY.invalidate(sk_key)
+            get_sk_bundle.clear()
+            st.rerun()
+        if st.button(f"🧹 Dọn registry (giữ {REGISTRY_KEEP} model mới nhất)"):
+            REGISTRY.prune(REGISTRY_KEEP, keep=sk_keys.values())
+            get_sk_bundle.clear()
+            st.rerun()
+    with profiling.stage("sk models", cache=True):
+        bundle = get_sk_bundle(df_all, df_map, variant, sk_key)
+    sk_res, y_te = bundle["results"], bundle["y_te"]
+    failed = {nm: r["Status"] for nm, r in bundle.get("runs", {}).items() if r["Status"] != "ok"}
+    if not sk_res:
+        st.error("Không có model nào train xong: " + ", ".join(f"{nm} ({s})" for nm, s in failed.items()))
+        end_page()
+    if failed:
+        st.warning("Model lỗi / quá thời gian, kết quả không được lưu vào registry: "
+                   + ", ".join(f"{nm} ({s})" for nm, s in failed.items()))
+    with profiling.stage("name index", cache=True):
+        name_idx = get_name_index(df_comp, df_all, (DIGESTS[0], data_fp))
+
+    # --- PySpark models (long-lived local session, artifacts in .cache/spark) ---
+    @st.cache_data(max_entries=16)
+    def spark_key_of(src, digests, _df_all):
+        return spark_data_key(_df_all)
+
+    @st.cache_resource(show_spinner="Spark…")
+    def get_spark_results(_df_all, key):
+        profiling.miss()
+        return train_spark_models(_df_all)
+
+    with profiling.stage("spark", cache=True):
+        sp_res, sp_preds, sp_times = get_spark_results(df_all, spark_key_of(src, DIGESTS, df_all))
 
     # --- Hiển thị 3 tab ---
     tab1, tab2, tab3 = st.tabs(["🔹 Scikit-Learn","🔸 PySpark","🤖 Interactive"])
@@ -400,11 +403,15 @@ if menu == "🤖 Recommendation":
     with tab1:
         st.subheader("Scikit-Learn Metrics")
         df_sk = pd.DataFrame({
-            nm: {**{k:v for k,v in stats.items() if k in ["Acc","Prec","Rec","F1","AUC"]}}
+            nm: {**{k:v for k,v in stats.items() if k in METRICS}}
             for nm,stats in sk_res.items()
         }).T
         st.dataframe(df_sk.style.format("{:.2%}"))
 
+        # Wall time / peak memory per model (timeouts & errors included)
+        df_runs = pd.DataFrame(bundle.get("runs", {})).T.reindex(columns=["Status","Time","PeakMB"])
+        st.dataframe(df_runs.style.format({"Time":"{:.1f}s","PeakMB":"{:,.0f} MB"}, na_rep="–"))
+
         # Confusion Matrix
         fig, axes = plt.subplots(2,2,figsize=(12,10)); axes=axes.flatten()
         for ax,(nm,stats) in zip(axes, sk_res.items()):
@@ -440,35 +447,33 @@ if menu == "🤖 Recommendation":
         # ROC Curves
         fig4, ax4 = plt.subplots(figsize=(6,6))
         for nm,pdf in sp_preds.items():
-            scores = pdf["probability"].apply(lambda v: v[1])
-            RocCurveDisplay.from_predictions(pdf["label"].astype(int), scores, name=nm, ax=ax4)
+            RocCurveDisplay.from_predictions(pdf["label"].astype(int), pdf["prob"], name=nm, ax=ax4)
         st.pyplot(fig4)
 
+        # Stage timings (first run: session / fit; later runs: load only)
+        st.dataframe(pd.Series(sp_times, name="Seconds").to_frame().style.format("{:.2f}"))
+
     # Tab Interactive
     with tab3:
         st.subheader("Interactive Prediction")
-        best = max(sk_res.items(), key=lambda x: x[1]["Acc"])[0]
+        best = best_model(sk_res)
         st.markdown(f"**Best model:** {best}")
-        clf = {
-            "LR":  LogisticRegression(class_weight="balanced", max_iter=500),
-            "RF":  RandomForestClassifier(class_weight="balanced"),
-            "SVM": SVC(probability=True, class_weight="balanced"),
-            "XGB": XGBClassifier(use_label_encoder=False, eval_metric="logloss")
-        }[best]
-        clf.fit(X_res, y_res)
+        scores = bundle["scores"]
 
         q = st.text_input("Nhập partial tên công ty để dự đoán Recommend?")
         if q:
-            mask = df_all["Company Name"].str.contains(q, case=False, na=False)
-            if not mask.any():
+            with profiling.stage("interactive: lookup", query=q):
+                rows = name_idx.rows(q)
+            if not len(rows):
                 st.warning("Không tìm thấy công ty.")
             else:
-                Xq   = X[mask.values]
-                pr   = clf.predict_proba(Xq)[:,1]
+                pr   = np.asarray(scores[rows])
                 st.metric("Recommend rate", f"{(pr>0.5).mean():.2%}")
 
                 df_detail = pd.DataFrame({
-                    "Review": df_all.loc[mask, "Clean_rev"],
+                    "Review": df_all["Clean_rev"].iloc[rows],
                     "Prob":   [f"{x:.2%}" for x in pr]
                 })
                 st.dataframe(df_detail, use_container_width=True)
+
+render_diagnostics()
@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+# benchmarks/run_bench.py — time & peak memory of the app's pipeline stages
+#
+#   python -m benchmarks.run_bench --sizes 1000 10000 --out bench.json
+#   python -m benchmarks.run_bench --sizes 1000 10000 --baseline bench_baseline.json --fail-on-regression
+#
+# Every run uses synthetic data from benchmarks.synth_data (fixed seed) and fresh
+# cache directories, so numbers are comparable across commits. Stages whose
+# optional dependencies are missing are recorded as "skipped".
+
+import argparse, json, os, platform, re, subprocess, sys, tempfile, time
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from benchmarks import synth_data
+from profiling import Profiler, use
+
+STAGES = ["load_all", "clean_text", "similarity", "train_sk_models", "spark"]
+
+
+# ─── Measurement ───────────────────────────────────────────────────────────────
+# Same Profiler as the app's diagnostics panel, so the library's own nested
+# stages (ingest reads, translate, spaCy, sim methods, SMOTE, spark) land in the
+# results too. Top-level benchmark stages have depth 0.
+class Bench:
+    def __init__(self):
+        self.prof = Profiler(maxlen=None)
+
+    @property
+    def results(self):
+        return list(self.prof.records)
+
+    @contextmanager
+    def stage(self, stage, size, **extra):
+        self.prof.tags["size"] = size
+        rec = {}
+        try:
+            with use(self.prof), self.prof.stage(stage, **extra) as rec:
+                yield rec
+        except ImportError as e:
+            rec["status"] = f"skipped: {e}"
+        except Exception:
+            pass                                    # status already "error: …"
+        print(f"  {stage:34s} {size:>9,}  {rec.get('wall_s', 0):8.2f}s  "
+              f"{rec.get('peak_mb', 0):8.1f} MB  {rec.get('status')}", file=sys.stderr)
+
+
+# ─── Stages ────────────────────────────────────────────────────────────────────
+def _clean_fn():
+    """Full spaCy clean with an offline (no-network) translator."""
+    from text_clean import clean_series, load_nlp, stop_words
+    from translation_cache import OfflineBackend, TranslationCache, cached_translator
+    nlp, sw = load_nlp(), stop_words()
+    tr = cached_translator(TranslationCache(":memory:"), OfflineBackend())
+    return lambda s: clean_series(s, nlp, sw, translate=tr)
+
+
+def _normalize_only(s):
+    # stand-in when spaCy is missing, so the downstream stages still get data
+    from text_clean import CleanStats, normalize_series
+    s = s.fillna("").astype(str)
+    return normalize_series(s, frozenset()), CleanStats(len(s))
+
+
+def _legacy(df):
+    # dtypes the frames had before the compact model: Python-object strings, 64-bit numbers
+    return df.astype({c: (object if not pd.api.types.is_numeric_dtype(t) else
+                          np.float64 if pd.api.types.is_float_dtype(t) else np.int64)
+                      for c, t in df.dtypes.items()})
+
+
+def run_size(bench, n, work, fmt, stages, sim_queries=100, workers=None):
+    import ingest
+    d     = os.path.join(work, f"n{n}")
+    dfs   = synth_data.generate(n)
+    paths = synth_data.write(dfs, os.path.join(d, "data"), fmt)
+    data  = None
+
+    clean = None
+    if stages & {"load_all", "clean_text"}:
+        with bench.stage("nlp: load", n):
+            clean = _clean_fn()
+    if "load_all" in stages and clean:
+        for label in ("cold", "warm"):
+            with bench.stage(f"load_all ({label})", n):
+                data = ingest.load_all("A", *paths, clean, root=os.path.join(d, "ingest"))
+    if "clean_text" in stages and clean:
+        text = dfs[2]["What I liked"].fillna("") + " " + dfs[2]["Suggestions for improvement"].fillna("")
+        with bench.stage("clean_text", n) as rec:
+            rec["docs_per_s"] = clean(text)[1].docs_per_sec
+    if data is None:
+        data = ingest.load_all("A", *paths, _normalize_only, root=os.path.join(d, "ingest_norm"))
+    df_comp, df_map, df_all = data[:3]
+
+    # in-memory size: compact data model vs the old per-review joined frame
+    with bench.stage("data model: memory", n) as rec:
+        rec["mb_compact"] = ingest.memory_mb(df_comp, df_map, df_all)
+        rec["mb_wide"]    = ingest.memory_mb(df_comp, df_map, _legacy(ingest.wide_frame(df_comp, df_map, df_all)))
+
+    if "similarity" in stages:
+        sim = None
+        with bench.stage("similarity: build_index", n):
+            from sim_index import METHODS, SimIndex, build_index
+            sim = SimIndex.load(build_index(df_comp, df_map, df_all, root=os.path.join(d, "sim")))
+        if sim is not None:
+            q = np.random.default_rng(0).choice(sim.ids, size=min(sim_queries, len(sim)), replace=False)
+            for key in METHODS:
+                if key not in sim.mats:
+                    continue
+                with bench.stage(f"similarity: {key} query", n, queries=len(q)):
+                    for cid in q:
+                        sim.query(cid, key, 5)
+                with bench.stage(f"similarity: {key} query_all", n):
+                    sim.query_all(key, 5)
+
+    if "train_sk_models" in stages:
+        runs = {}
+        with bench.stage("train_sk_models", n):
+            from features import build_features, labels, split_resample
+            from training import train_sk_models
+            X, _, _ = build_features(df_all, df_map)
+            bench.prof.add("features: X", X_mb=(X.data.nbytes + X.indices.nbytes + X.indptr.nbytes) / 2**20,
+                           X_mb_float64=(2 * X.data.nbytes + X.indices.nbytes + X.indptr.nbytes) / 2**20)
+            _, _, runs = train_sk_models(*split_resample(X, labels(df_all)), max_workers=workers)
+        # per-model numbers come from the worker processes themselves
+        for nm, r in runs.items():
+            bench.prof.add(f"train_sk_models: {nm} fit", wall_s=r.get("Fit", r["Time"]),
+                           peak_mb=r["PeakMB"], status=r["Status"])
+            if "Predict" in r:
+                bench.prof.add(f"train_sk_models: {nm} predict", wall_s=r["Predict"])
+
+    if "spark" in stages:
+        for label in ("cold", "warm"):
+            with bench.stage(f"spark ({label})", n):
+                from spark_backend import train_spark_models
+                train_spark_models(df_all, root=os.path.join(d, "spark"))
+
+
+# ─── Baseline comparison ───────────────────────────────────────────────────────
+def _totals(results):
+    # nested stages repeat (e.g. "translate" per cleaned column): sum per key
+    out = {}
+    for r in results:
+        if r.get("status") == "ok" and r.get("wall_s") is not None:
+            k = (r["stage"], r.get("parent"), r["size"])
+            out[k] = out.get(k, 0.0) + r["wall_s"]
+    return out
+
+
+def _family(stage):
+    # top-level benchmark stage a record belongs to: "similarity: w2v query" → "similarity"
+    return re.split(r"[ :]", stage, maxsplit=1)[0]
+
+
+def compare(results, baseline, tol):
+    """Print base vs now per stage; return the number of regressions.
+
+    A stage that was ok in the baseline counts as a regression when it is now slower
+    than tol allows, ended with an error / skip, or is missing although its parent
+    (or its top-level family, e.g. "similarity") ran at that size.
+    """
+    base, now = _totals(baseline["results"]), _totals(results)
+    status = {}
+    for r in results:
+        k = (r["stage"], r.get("parent"), r["size"])
+        if status.get(k, "ok") == "ok":
+            status[k] = r.get("status")
+    ran  = {(r["stage"], r["size"]) for r in results}
+    fams = {(_family(r["stage"]), r["size"]) for r in results if not r.get("parent")}
+
+    rows, regressions = [], 0
+    for k, bw in base.items():
+        st, parent, n = k
+        nw, ratio = now.get(k), None
+        if status.get(k, "ok") != "ok":
+            flag = status[k].split(":")[0].upper()
+        elif nw is not None:
+            ratio = nw / bw if bw else 1.0
+            flag  = "REGRESSION" if ratio > 1 + tol else ("faster" if ratio < 1 - tol else "")
+        elif ((parent, n) in ran) if parent else ((_family(st), n) in fams):
+            flag = "MISSING"
+        else:
+            continue                                # not part of this run (other sizes / stages)
+        regressions += flag not in ("", "faster")
+        rows.append((st, n, bw, nw, ratio, flag))
+    print(f"\n{'stage':34s} {'size':>9s} {'base s':>9s} {'now s':>9s} {'×':>6s}")
+    for st, n, bw, nw, ratio, flag in rows:
+        nw_s, r_s = ("–", "–") if ratio is None else (f"{nw:.2f}", f"{ratio:.2f}")
+        print(f"{st:34s} {n:>9,} {bw:9.2f} {nw_s:>9s} {r_s:>6s}  {flag}")
+    return regressions
+
+
+def _meta():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = None
+    return {"commit": commit, "python": sys.version.split()[0], "platform": platform.platform(),
+            "cpus": os.cpu_count(), "time": time.strftime("%Y-%m-%dT%H:%M:%S")}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="ITViec Explorer benchmark suite")
+    ap.add_argument("--sizes",     type=int, nargs="+", default=[1_000, 10_000])
+    ap.add_argument("--stages",    nargs="+", choices=STAGES, default=STAGES)
+    ap.add_argument("--format",    choices=["xlsx", "csv", "parquet"], default=None,
+                    help="input file format (default: xlsx up to 100k reviews, parquet above)")
+    ap.add_argument("--workers",   type=int, default=None, help="train_sk_models max_workers")
+    ap.add_argument("--workdir",   default=None, help="keep generated data/caches here")
+    ap.add_argument("--out",       default="bench_results.json")
+    ap.add_argument("--baseline",  default=None, help="earlier results JSON to compare against")
+    ap.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown before flagging")
+    ap.add_argument("--fail-on-regression", action="store_true")
+    args = ap.parse_args(argv)
+
+    bench = Bench()
+    with tempfile.TemporaryDirectory(prefix="itviec-bench-") as tmp:
+        work = args.workdir or tmp
+        for n in args.sizes:
+            fmt = args.format or ("xlsx" if n <= 100_000 else "parquet")
+            print(f"[n={n:,} · {fmt}]", file=sys.stderr)
+            run_size(bench, n, work, fmt, set(args.stages), workers=args.workers)
+
+    out = {"meta": _meta(), "results": bench.results}
+    with open(args.out, "w") as f:
+        json.dump(out, f, indent=2, default=float)
+    print(f"wrote {args.out}", file=sys.stderr)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            n_reg = compare(bench.results, json.load(f), args.tolerance)
+        if n_reg and args.fail_on_regression:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+# benchmarks/synth_data.py — synthetic ITViec-shaped datasets (3-file schema)
+#
+#   python -m benchmarks.synth_data --reviews 100000 --out data/synth_100k --format parquet
+#
+# Writes Overview_Companies / Overview_Reviews / Reviews with the columns app.py
+# reads: company overview text keyed by id, numeric ratings keyed by id, and
+# reviews with "What I liked" / "Suggestions for improvement" / "Recommend?".
+
+import argparse, os
+
+import numpy as np
+import pandas as pd
+
+EN_WORDS = ("team project salary benefit manager office culture training client process "
+            "friendly flexible overtime deadline growth learning technology product agile "
+            "engineer develop support environment leader career bonus insurance remote "
+            "review feedback communication policy system software quality customer").split()
+EN_GOOD  = "good great nice friendly supportive modern happy professional helpful".split()
+EN_BAD   = "slow low poor unclear stressful outdated late limited heavy".split()
+VI_WORDS = ("môi trường làm việc thân thiện lương thưởng tốt đồng nghiệp vui vẻ quản lý "
+            "dự án nhiều cơ hội học hỏi phúc lợi văn phòng đẹp tăng ca chính sách").split()
+INDUSTRY = ["IT Services and IT Consulting", "Software Products and Web Services", "Financial Services",
+            "E-commerce", "Telecommunication", "Game"]
+SIZES    = ["1-50 employees", "51-150 employees", "151-300 employees", "301-500 employees", "1000+ employees"]
+RATINGS  = ["Overall rating", "Salary & benefits", "Training & learning", "Management cares about me",
+            "Culture & fun", "Office & workspace"]
+
+
+def _texts(rng, n, lo, hi, pools, p_pool):
+    """n space-joined texts; each picks one word pool (e.g. EN / VI) with probability p_pool."""
+    lens  = rng.integers(lo, hi, size=n)
+    which = rng.choice(len(pools), size=n, p=p_pool)
+    out   = np.empty(n, dtype=object)
+    for k, pool in enumerate(pools):
+        idx = np.flatnonzero(which == k)
+        if not len(idx):
+            continue
+        words = np.asarray(pool, dtype=object)[rng.integers(0, len(pool), size=int(lens[idx].sum()))]
+        cuts  = np.cumsum(lens[idx])[:-1]
+        out[idx] = [" ".join(w) for w in np.split(words, cuts)]
+    return out
+
+
+def generate(n_reviews, n_companies=None, seed=42, viet_share=0.1):
+    """→ (df_comp, df_map, df_rev) following the ITViec export schema."""
+    rng = np.random.default_rng(seed)
+    n_c = n_companies or max(10, n_reviews // 30)
+    ids = np.arange(1, n_c + 1)
+
+    df_comp = pd.DataFrame({
+        "id":                ids,
+        "Company Name":      [f"Company {i:05d} {rng.choice(['Tech', 'Soft', 'Digital', 'Labs', 'Global'])}" for i in ids],
+        "Company Type":      rng.choice(["Product", "Outsourcing", "Headhunt"], size=n_c),
+        "Company industry":  rng.choice(INDUSTRY, size=n_c),
+        "Company size":      rng.choice(SIZES, size=n_c),
+        "Country":           rng.choice(["Vietnam", "Japan", "Singapore", "United States"], size=n_c),
+        "Company overview":  _texts(rng, n_c, 30, 200, [EN_WORDS + EN_GOOD, VI_WORDS], [1 - viet_share, viet_share]),
+    })
+
+    quality = rng.normal(3.8, 0.6, size=n_c).clip(1, 5)
+    df_map  = pd.DataFrame({"id": ids, "Company Name": df_comp["Company Name"],
+                            "Number of reviews": np.zeros(n_c, dtype=int)})
+    for col in RATINGS:
+        df_map[col] = (quality + rng.normal(0, 0.3, size=n_c)).clip(1, 5).round(1)
+    df_map["Recommend working here to a friend"] = (quality / 5 * 100).round().astype(int)
+
+    # skewed review counts per company (a few companies get most reviews)
+    w       = rng.pareto(1.2, n_c) + 1
+    comp_of = rng.choice(ids, size=n_reviews, p=w / w.sum())
+    df_map["Number of reviews"] = np.bincount(comp_of, minlength=n_c + 1)[1:]
+    p_yes   = np.clip(quality[comp_of - 1] / 5 + rng.normal(0, 0.15, size=n_reviews), 0.02, 0.98)
+    yes     = rng.random(n_reviews) < p_yes
+    df_rev  = pd.DataFrame({
+        "id":                          comp_of,
+        "Title":                       _texts(rng, n_reviews, 2, 8, [EN_WORDS + EN_GOOD], [1.0]),
+        "What I liked":                _texts(rng, n_reviews, 5, 60, [EN_WORDS + EN_GOOD, VI_WORDS], [1 - viet_share, viet_share]),
+        "Suggestions for improvement": _texts(rng, n_reviews, 3, 40, [EN_WORDS + EN_BAD, VI_WORDS], [1 - viet_share, viet_share]),
+        "Rating":                      np.clip(np.round(p_yes * 5 + rng.normal(0, 0.5, size=n_reviews)), 1, 5).astype(int),
+        "Recommend?":                  np.where(yes, "Yes", "No"),
+    })
+    return df_comp, df_map, df_rev
+
+
+FILES = ("Overview_Companies", "Overview_Reviews", "Reviews")
+
+
+def write(dfs, out_dir, fmt="xlsx"):
+    """Write the three tables; returns their paths in load_all order (comp, map, rev)."""
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for name, df in zip(FILES, dfs):
+        path = os.path.join(out_dir, f"{name}.{fmt}")
+        if fmt == "xlsx":
+            df.to_excel(path, index=False)
+        elif fmt == "csv":
+            df.to_csv(path, index=False)
+        else:
+            df.to_parquet(path, index=False)
+        paths.append(path)
+    return paths
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Generate a synthetic ITViec-shaped dataset")
+    ap.add_argument("--reviews",   type=int, default=10_000)
+    ap.add_argument("--companies", type=int, default=None)
+    ap.add_argument("--seed",      type=int, default=42)
+    ap.add_argument("--viet",      type=float, default=0.1, help="share of Vietnamese texts")
+    ap.add_argument("--format",    choices=["xlsx", "csv", "parquet"], default="xlsx")
+    ap.add_argument("--out",       required=True)
+    args = ap.parse_args(argv)
+    if args.format == "xlsx" and args.reviews > 1_000_000:
+        ap.error("Excel holds at most 1,048,576 rows; use --format parquet or csv")
+    for p in write(generate(args.reviews, args.companies, args.seed, args.viet), args.out, args.format):
+        print(p)
+
+
+if __name__ == "__main__":
+    main()
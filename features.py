@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+# features.py — Recommendation feature pipeline (review TF-IDF + numeric ratings)
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.model_selection import train_test_split
+
+from profiling import stage
+
+FEATURE_PARAMS = dict(max_features=3000, test_size=0.2, random_state=42, smote=True, dtype="float32")
+
+
+def rating_table(df_map) -> pd.DataFrame:
+    # numeric ratings indexed by company id
+    return df_map.set_index("id").select_dtypes(include="number").fillna(0)
+
+
+def build_features(df_all, df_map, tv=None, num_cols=None):
+    """X = [TF-IDF(Clean_rev) | ratings of the review's company] as float32 CSR; fits tv when not given."""
+    text = df_all["Clean_rev"].fillna("")
+    with stage("features: tfidf", fit=tv is None, rows=len(text)):
+        if tv is None:
+            tv = TfidfVectorizer(max_features=FEATURE_PARAMS["max_features"], dtype=np.float32)
+            Xr = tv.fit_transform(text)
+        else:
+            Xr = tv.transform(text)
+    with stage("features: ratings"):
+        ratings  = rating_table(df_map)
+        num_cols = list(ratings.columns) if num_cols is None else list(num_cols)
+        R   = ratings.reindex(columns=num_cols).fillna(0).to_numpy(dtype=np.float32)
+        # one ratings row per company, gathered by position (no per-review frame)
+        pos = ratings.index.get_indexer(df_all["id"])
+        num = np.zeros((len(pos), len(num_cols)), dtype=np.float32)
+        num[pos >= 0] = R[pos[pos >= 0]]
+        X   = sp.hstack([Xr, sp.csr_matrix(num)], format="csr", dtype=np.float32)
+    return X, tv, num_cols
+
+
+def split_resample(X, y, params=FEATURE_PARAMS):
+    X_tr, X_te, y_tr, y_te = train_test_split(
+        X, y, test_size=params["test_size"], random_state=params["random_state"],
+        stratify=y if pd.Series(y).nunique()>1 else None
+    )
+    if params.get("smote", True):
+        from imblearn.over_sampling import SMOTE
+        with stage("features: smote", rows_in=X_tr.shape[0]) as rec:
+            X_tr, y_tr = SMOTE(random_state=params["random_state"]).fit_resample(X_tr, y_tr)
+            rec["rows_out"] = X_tr.shape[0]
+    return X_tr, y_tr, X_te, y_te
+
+
+def labels(df_all) -> np.ndarray:
+    return df_all["Label"].to_numpy()
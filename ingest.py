@@ -0,0 +1,402 @@
+# -*- coding: utf-8 -*-
+# ingest.py — content-hashed Parquet cache for the uploaded Excel/CSV files
+
+import hashlib, json, os, shutil, threading, time
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from profiling import miss, stage
+from text_clean import CleanStats
+
+DEFAULT_ROOT  = os.path.join(".cache", "ingest")
+CLEAN_VERSION = 1       # bump when text_clean output changes → state is rebuilt
+REVIEW_COLS   = ["id", "What I liked", "Suggestions for improvement", "Recommend?"]
+STR_DTYPE     = "string[pyarrow]"   # contiguous Arrow buffers instead of one PyObject per text
+
+
+def file_digest(fp) -> str:
+    """sha256 of an uploaded file (Streamlit UploadedFile / file object) or a path."""
+    h = hashlib.sha256()
+    if isinstance(fp, (str, os.PathLike)):
+        with open(fp, "rb") as f:
+            for blk in iter(lambda: f.read(1 << 20), b""):
+                h.update(blk)
+    elif hasattr(fp, "getvalue"):
+        h.update(fp.getvalue())
+    else:
+        pos = fp.tell()
+        for blk in iter(lambda: fp.read(1 << 20), b""):
+            h.update(blk)
+        fp.seek(pos)
+    return h.hexdigest()
+
+
+def _typed(df):
+    # object columns → pandas string dtype so every Parquet column has one Arrow type
+    for c in df.columns[df.dtypes == object]:
+        df[c] = df[c].astype("string")
+    return df
+
+
+def reader_for(fp, default):
+    # pick the parser from the file name; the upload widgets only pass xlsx/csv,
+    # but scripts (benchmarks, CLI) may hand over Parquet/CSV paths directly
+    name = fp if isinstance(fp, (str, os.PathLike)) else getattr(fp, "name", "")
+    ext  = os.path.splitext(str(name))[1].lower()
+    return {".csv": pd.read_csv, ".parquet": pd.read_parquet,
+            ".xlsx": pd.read_excel, ".xls": pd.read_excel}.get(ext, default)
+
+
+def _rewind(fp):
+    if hasattr(fp, "seek"):
+        fp.seek(0)
+    return fp
+
+
+def raw_table(fp, reader, kind, root=DEFAULT_ROOT, columns=None, digest=None):
+    """Parse fp once with reader (pd.read_excel / pd.read_csv); later loads read Parquet."""
+    digest = digest or file_digest(fp)
+    path   = os.path.join(root, f"{kind}-{digest[:20]}.parquet")
+    with stage(f"ingest: read {kind}", cache=True) as rec:
+        if not os.path.exists(path):
+            miss()
+            os.makedirs(root, exist_ok=True)
+            df  = _typed(reader(_rewind(fp)))
+            tmp = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"     # sessions may upload the same file
+            df.to_parquet(tmp, index=False)
+            os.replace(tmp, path)
+        if columns is not None:
+            import pyarrow.parquet as pq
+            have    = set(pq.read_schema(path).names)
+            columns = [c for c in columns if c in have]
+        df = pd.read_parquet(path, columns=columns)
+        rec["rows"] = len(df)
+    return df, digest
+
+
+def row_hash(df, cols) -> np.ndarray:
+    return pd.util.hash_pandas_object(df[list(cols)], index=False).to_numpy()
+
+
+# ─── Incremental state (source A) ──────────────────────────────────────────────
+# Every ingested dataset is kept under root/state, keyed by its upload digests:
+# companies and reviews with their row hashes and cleaned text, plus the grouped
+# per-company review documents. Each write goes to a new, uniquely named version
+# directory; the pointer file <key>.current (and LATEST, the most recent key) is
+# then switched with os.replace, so readers only ever see complete versions.
+# Reloading the same files reads that state back; a new upload is diffed against
+# the state of the same files (if one was left incomplete) or the LATEST one, and
+# only added/changed rows are cleaned. Rows whose translation failed are stored
+# without cleaned text so the next load retries them.
+STATE_FILES = ("comp", "rev", "map", "rev_grp")
+
+_state_lock = threading.Lock()      # sessions share the process; publish one state at a time
+
+
+@dataclass
+class DeltaReport:
+    comp_added:      int  = 0
+    comp_changed:    int  = 0
+    comp_removed:    int  = 0
+    rev_added:       int  = 0
+    rev_removed:     int  = 0
+    ratings_changed: bool = False
+    full:            bool = False     # no previous state → everything was (re)built
+    stale:           list = field(default_factory=list)
+
+    @property
+    def changed(self):
+        return self.full or any([self.comp_added, self.comp_changed, self.comp_removed,
+                                 self.rev_added, self.rev_removed, self.ratings_changed])
+
+    def summary(self):
+        if self.full:
+            return "full build"
+        return (f"companies +{self.comp_added} ~{self.comp_changed} -{self.comp_removed} · "
+                f"reviews +{self.rev_added} -{self.rev_removed}"
+                + (" · ratings changed" if self.ratings_changed else ""))
+
+
+def _stale(r: DeltaReport):
+    out = []
+    comp = r.full or r.comp_added or r.comp_changed or r.comp_removed
+    revs = r.full or r.rev_added or r.rev_removed or r.comp_added or r.comp_removed
+    if comp:                      out.append("sim_index: overview methods")
+    if revs:                      out.append("sim_index: review methods")
+    if r.full or r.ratings_changed: out.append("sim_index: numeric ratings")
+    if revs or r.ratings_changed: out += ["model registry (sk models + scores)", "spark models"]
+    if comp:                      out.append("company name index")
+    return out
+
+
+def _state_key(digests):
+    return hashlib.sha1("\x00".join([str(CLEAN_VERSION), *digests]).encode()).hexdigest()[:20]
+
+
+def _state_path(sdir, name):
+    return os.path.join(sdir, f"{name}.parquet")
+
+
+def _read_manifest(sdir):
+    with open(os.path.join(sdir, "manifest.json")) as f:
+        manifest = json.load(f)
+    return manifest if manifest.get("clean_version") == CLEAN_VERSION else None
+
+
+def _pointer(root, name):
+    # current target of a pointer file (<key>.current → version dir, LATEST → key)
+    try:
+        with open(os.path.join(root, "state", name)) as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def _point(root, name, target):
+    tmp = os.path.join(root, "state", f".{name}.tmp-{os.getpid()}-{threading.get_ident()}")
+    with open(tmp, "w") as f:
+        f.write(target)
+    os.replace(tmp, os.path.join(root, "state", name))
+
+
+def _current_dir(root, key):
+    ver = _pointer(root, f"{key}.current") if key else None
+    return os.path.join(root, "state", ver) if ver else None
+
+
+def _read_state(sdir, names=STATE_FILES):
+    """→ (manifest, {name: DataFrame}), or None if there is no usable state in sdir."""
+    if sdir is None:
+        return None
+    try:
+        manifest = _read_manifest(sdir)
+        if manifest is None:
+            return None
+        return manifest, {n: pd.read_parquet(_state_path(sdir, n)) for n in names}
+    except OSError:
+        return None         # superseded and removed while being read: rebuild instead
+
+
+def _write_state(root, key, tables, manifest):
+    ver  = f"{key}-{os.getpid()}-{threading.get_ident()}-{time.time_ns()}"
+    sdir = os.path.join(root, "state", ver)
+    os.makedirs(sdir)
+    for name, df in tables.items():
+        df.to_parquet(_state_path(sdir, name), index=False)
+    with open(os.path.join(sdir, "manifest.json"), "w") as f:
+        json.dump(manifest, f)
+    with _state_lock:
+        prev = _pointer(root, f"{key}.current")
+        _point(root, f"{key}.current", ver)
+        _point(root, "LATEST", key)
+        # the version just superseded stays for readers that resolved it a moment ago
+        for d in os.listdir(os.path.join(root, "state")):
+            if d.startswith(key + "-") and d not in (ver, prev):
+                shutil.rmtree(os.path.join(root, "state", d), ignore_errors=True)
+
+
+def load_rev_grp(root=DEFAULT_ROOT, digests=None):
+    """Grouped review document per company id, as maintained by the incremental ingest.
+
+    With digests given, reads the state built from exactly those files; otherwise
+    the most recently written state. None when there is no such state.
+    """
+    key   = _state_key(digests) if digests is not None else _pointer(root, "LATEST")
+    state = _read_state(_current_dir(root, key), ("rev_grp",))
+    return state[1]["rev_grp"].set_index("id")["doc"] if state else None
+
+
+def _group(df_rev, ids):
+    return df_rev[df_rev["id"].isin(ids)].groupby("id", sort=False)["Clean_rev"].apply(" ".join)
+
+
+def _clean_missing(df, col, need, texts, clean):
+    if not need.any():
+        return CleanStats()
+    with stage(f"clean: {col}", docs=int(need.sum())):
+        s, stats = clean(texts(df.loc[need]))
+        df.loc[need, col] = s.to_numpy()
+    return stats
+
+
+def _without(df, col, labels):
+    # copy for the state files: rows cleaned from untranslated text are stored as missing
+    if not len(labels):
+        return df
+    df = df.copy()
+    df.loc[labels, col] = pd.NA
+    return df
+
+
+def incremental_load(comp_fp, map_fp, rev_fp, clean, root=DEFAULT_ROOT, digests=None):
+    """→ df_comp, df_map, df_rev, clean stats, DeltaReport (source A)."""
+    d1, d2, d3 = digests or tuple(map(file_digest, (comp_fp, map_fp, rev_fp)))
+    key        = _state_key((d1, d2, d3))
+    with stage("ingest: read state"):
+        own = _read_state(_current_dir(root, key))
+    if own and own[0].get("complete", True):
+        old     = own[1]
+        df_comp = old["comp"].drop(columns=["_hash"])
+        df_rev  = old["rev"][["id", "Recommend?", "Clean_rev"]]
+        return df_comp, old["map"], df_rev, CleanStats(), DeltaReport()
+
+    # base for the diff: an incomplete state of these very files, else the latest one
+    base = own or _read_state(_current_dir(root, _pointer(root, "LATEST")))
+    manifest, prev = base or (None, {})
+
+    df_comp, _ = raw_table(comp_fp, reader_for(comp_fp, pd.read_excel), "comp", root, digest=d1)
+    df_map,  _ = raw_table(map_fp, reader_for(map_fp, pd.read_excel), "map",  root, digest=d2)
+    df_rev,  _ = raw_table(rev_fp, reader_for(rev_fp, pd.read_excel), "rev",  root, columns=REVIEW_COLS, digest=d3)
+    rep = DeltaReport(full=manifest is None)
+
+    # companies: key id, row hash over every raw column
+    df_comp["_hash"] = row_hash(df_comp, df_comp.columns)
+    df_comp["Clean_desc"] = pd.Series(pd.NA, index=df_comp.index, dtype=object)
+    old_ids = set()
+    if manifest:
+        old = prev["comp"]
+        old_ids = set(old["id"])
+        known = old.dropna(subset=["Clean_desc"]).drop_duplicates("_hash").set_index("_hash")["Clean_desc"]
+        df_comp["Clean_desc"] = df_comp["_hash"].map(known)
+        new_ids = set(df_comp["id"])
+        rep.comp_added   = len(new_ids - old_ids)
+        rep.comp_removed = len(old_ids - new_ids)
+        rep.comp_changed = int((~df_comp["_hash"].isin(old["_hash"]) & df_comp["id"].isin(old_ids)).sum())
+    st_desc = _clean_missing(df_comp, "Clean_desc", df_comp["Clean_desc"].isna(),
+                             lambda d: d["Company overview"].fillna(""), clean)
+
+    # reviews: key id + row hash (+ occurrence number for exact duplicates)
+    df_rev["_hash"] = row_hash(df_rev, [c for c in REVIEW_COLS if c in df_rev.columns])
+    df_rev["_dup"]  = df_rev.groupby("_hash").cumcount()
+    df_rev["Clean_rev"] = pd.Series(pd.NA, index=df_rev.index, dtype=object)
+    touched = set()
+    if manifest:
+        old = prev["rev"]
+        key = pd.MultiIndex.from_frame(old[["_hash", "_dup"]])
+        pos = key.get_indexer(pd.MultiIndex.from_frame(df_rev[["_hash", "_dup"]]))
+        hit = pos >= 0
+        df_rev.loc[hit, "Clean_rev"] = old["Clean_rev"].to_numpy()[pos[hit]]
+        gone = np.ones(len(old), dtype=bool); gone[pos[hit]] = False
+        rep.rev_added   = int((~hit).sum())
+        rep.rev_removed = int(gone.sum())
+        # companies that lost rows, or whose kept rows changed order (grouped text would differ)
+        order   = pd.Series(pos[hit]).groupby(df_rev.loc[hit, "id"].to_numpy()).is_monotonic_increasing
+        touched = set(old.loc[gone, "id"]) | set(order.index[~order.astype(bool).to_numpy()])
+        rep.ratings_changed = manifest["digests"][1] != d2
+    need = df_rev["Clean_rev"].isna()
+    touched |= set(df_rev.loc[need, "id"])        # new rows and earlier untranslated ones
+    st_rev = _clean_missing(df_rev, "Clean_rev", need, lambda d: (
+        d["What I liked"].fillna("") + " " +
+        d["Suggestions for improvement"].fillna("")
+    ), clean)
+    df_rev = df_rev.drop(columns=["What I liked", "Suggestions for improvement"])
+
+    # grouped review documents: only companies whose reviews (or membership) changed
+    ids = df_comp["id"][df_comp["id"].isin(df_map["id"])]
+    if manifest and not rep.ratings_changed:
+        grp  = prev["rev_grp"].set_index("id")["doc"]
+        grp  = grp.reindex(ids).astype(object)
+        redo = touched | (set(ids) - old_ids)
+        grp.update(_group(df_rev, redo))
+        grp[grp.index.isin(redo) & ~grp.index.isin(df_rev["id"])] = ""
+    else:
+        grp = _group(df_rev, set(ids)).reindex(ids)
+    grp = grp.fillna("")
+
+    rep.stale = _stale(rep)
+    failed    = st_desc.untranslated + st_rev.untranslated
+    with stage("ingest: write state", untranslated=len(failed)):
+        _write_state(root, key, {
+            "comp":    _without(df_comp, "Clean_desc", st_desc.untranslated),
+            "rev":     _without(df_rev, "Clean_rev", st_rev.untranslated),
+            "map":     df_map,
+            "rev_grp": grp.rename("doc").rename_axis("id").reset_index(),
+        }, {"digests": [d1, d2, d3], "clean_version": CLEAN_VERSION, "complete": not failed})
+
+    df_comp = df_comp.drop(columns=["_hash"])
+    df_rev  = df_rev[["id", "Recommend?", "Clean_rev"]]
+    return df_comp, df_map, df_rev, st_desc + st_rev, rep
+
+
+# ─── Compact data model ────────────────────────────────────────────────────────
+# Company-level columns (name, overview, ratings) live once in df_comp / df_map;
+# df_all holds only review columns plus "comp", the row position of the review's
+# company in df_comp (-1 if unknown). Use wide_frame() for the old joined layout.
+def memory_mb(*frames) -> float:
+    return sum(df.memory_usage(index=True, deep=True).sum() for df in frames) / 2**20
+
+
+def _company_codes(df_comp, ids) -> np.ndarray:
+    first = ~df_comp["id"].duplicated().to_numpy()
+    pos   = pd.Series(np.flatnonzero(first), index=df_comp["id"].to_numpy()[first])
+    return ids.map(pos).fillna(-1).to_numpy(dtype=np.int32)
+
+
+def compact(df_comp, df_all):
+    """→ df_comp with categorical/Arrow-string columns, review-level df_all with company codes."""
+    df_comp = df_comp.reset_index(drop=True)
+    for c in df_comp.columns:
+        s = df_comp[c]
+        if c == "id" or not (pd.api.types.is_object_dtype(s) or pd.api.types.is_string_dtype(s)):
+            continue
+        low = s.nunique(dropna=False) <= len(s) // 2
+        df_comp[c] = s.astype("category") if low else s.astype(STR_DTYPE)
+
+    rec = df_all["Recommend?"]
+    out = pd.DataFrame({
+        "id":         pd.to_numeric(df_all["id"], downcast="integer"),
+        "comp":       _company_codes(df_comp, df_all["id"]),
+        "Recommend?": rec.astype("category"),
+        "Clean_rev":  df_all["Clean_rev"].fillna("").astype(STR_DTYPE),
+        "Label":      (rec.astype(str).str.lower() == "yes").to_numpy(dtype=np.int8),
+    })
+    return df_comp, out
+
+
+def wide_frame(df_comp, df_map_num, df_all):
+    """Old per-review layout: company name, overview and ratings repeated on every row."""
+    return (
+        df_all.drop(columns=["comp"], errors="ignore")
+        .merge(df_map_num, on="id", how="left")
+        .merge(df_comp[["id","Company Name","Clean_desc"]], on="id", how="left")
+    )
+
+
+def load_all(src, comp_fp, map_fp, rev_fp_or_all_fp, clean, root=DEFAULT_ROOT, digests=None):
+    """→ df_comp, df_map_num, df_all, clean stats, DeltaReport (None for source B).
+
+    `clean(series) -> (series, CleanStats)` is only called for rows not seen before.
+    df_all is review-level (id, comp, Recommend?, Clean_rev, Label); see compact().
+    """
+    d1, d2, d3 = digests or (None, None, None)
+    delta      = None
+    if src == "A":
+        df_comp, df_map, df_rev, clean_stats, delta = incremental_load(
+            comp_fp, map_fp, rev_fp_or_all_fp, clean, root, digests)
+        # reviews of companies in both overview files, in Overview_Reviews order
+        # (what the former inner merges produced, without copying company columns)
+        ids    = df_map["id"].drop_duplicates()
+        pos    = pd.Index(ids).get_indexer(df_rev["id"])
+        keep   = (pos >= 0) & df_rev["id"].isin(df_comp["id"]).to_numpy()
+        df_all = df_rev[keep].iloc[np.argsort(pos[keep], kind="stable")]
+    else:
+        # src == "B"
+        df_map,  _ = raw_table(map_fp, reader_for(map_fp, pd.read_excel), "map", root, digest=d2)
+        df_comp, _ = raw_table(comp_fp, reader_for(comp_fp, pd.read_csv), "comp_csv", root, digest=d1)
+        df_all,  _ = raw_table(rev_fp_or_all_fp, reader_for(rev_fp_or_all_fp, pd.read_csv), "all_csv", root,
+                               columns=["id", "Recommend?", "Clean_rev"], digest=d3)
+        df_comp["Clean_desc"] = df_comp["Clean_desc"].fillna("")
+        clean_stats = CleanStats()
+
+    # numeric ratings, one float32 row per company (joined to reviews at feature-build time)
+    df_map_num = df_map.select_dtypes(include="number").fillna(0).astype(np.float32)
+    df_map_num["id"] = df_map["id"]
+
+    with stage("ingest: compact") as rec:
+        df_comp, df_all = compact(df_comp, df_all)
+        rec["rows"] = len(df_all)
+        rec["mb"]   = memory_mb(df_comp, df_map_num, df_all)
+
+    return df_comp, df_map_num, df_all, clean_stats, delta
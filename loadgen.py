@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+# loadgen.py — closed-loop load generator for scoring_service.py
+#
+#   python loadgen.py --endpoint score_reviews --concurrency 64 --duration 20
+#   python loadgen.py --endpoint similar_companies --ids 1 2 3 --method rev_w2v
+
+import argparse, asyncio, json, random, sys, time
+
+import numpy as np
+
+WORDS = ("good salary team friendly manager project overtime process benefit learn "
+         "environment office culture leader growth training client deadline flexible").split()
+
+
+async def _request(reader, writer, host, path, body):
+    data = json.dumps(body).encode() if body is not None else b""
+    meth = b"POST" if body is not None else b"GET"
+    writer.write(b"%s %s HTTP/1.1\r\nHost: %s\r\nContent-Type: application/json\r\nContent-Length: %d\r\n\r\n"
+                 % (meth, path.encode(), host.encode(), len(data)) + data)
+    await writer.drain()
+    status  = int((await reader.readline()).split()[1])
+    headers = {}
+    while (h := await reader.readline()) not in (b"\r\n", b""):
+        k, _, v = h.decode().partition(":")
+        headers[k.strip().lower()] = v.strip()
+    body = await reader.readexactly(int(headers.get("content-length", 0)))
+    return status, json.loads(body) if body else None
+
+
+def _payload(args, rng):
+    if args.endpoint == "score_reviews":
+        return {"reviews": [{"id": rng.choice(args.ids) if args.ids else None,
+                             "clean": " ".join(rng.choices(WORDS, k=rng.randint(5, 40)))}
+                            for _ in range(args.reviews_per_request)]}
+    return {"id": rng.choice(args.ids), "method": args.method, "k": args.k}
+
+
+async def _worker(args, deadline, lat, errs, seed):
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection(args.host, args.port)
+    path = "/" + args.endpoint
+    while time.perf_counter() < deadline:
+        t0 = time.perf_counter()
+        code, _ = await _request(reader, writer, args.host, path, _payload(args, rng))
+        lat.append(time.perf_counter() - t0)
+        if code != 200:
+            errs.append(code)
+    writer.close()
+
+
+async def run(args):
+    deadline = time.perf_counter() + args.duration
+    lat, errs = [], []
+    t0 = time.perf_counter()
+    await asyncio.gather(*(_worker(args, deadline, lat, errs, i) for i in range(args.concurrency)))
+    dt = time.perf_counter() - t0
+
+    reader, writer = await asyncio.open_connection(args.host, args.port)
+    _, stats = await _request(reader, writer, args.host, "/stats", None)
+    writer.close()
+
+    ms = np.asarray(lat) * 1000
+    report = {
+        "endpoint":    args.endpoint,
+        "concurrency": args.concurrency,
+        "requests":    len(lat),
+        "errors":      len(errs),
+        "rps":         round(len(lat) / dt, 1),
+        "latency_ms":  dict(zip(("p50", "p90", "p99", "max"),
+                                np.percentile(ms, [50, 90, 99, 100]).round(2).tolist())) if len(ms) else {},
+        "server":      stats.get(args.endpoint, {}),
+    }
+    print(json.dumps(report, indent=2))
+    return report
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Load generator for scoring_service.py")
+    ap.add_argument("--host",        default="127.0.0.1")
+    ap.add_argument("--port",        type=int, default=8600)
+    ap.add_argument("--endpoint",    default="score_reviews", choices=["score_reviews", "similar_companies"])
+    ap.add_argument("--concurrency", type=int,   default=32)
+    ap.add_argument("--duration",    type=float, default=10.0)
+    ap.add_argument("--reviews-per-request", type=int, default=1)
+    ap.add_argument("--ids",         nargs="*", type=int, default=[])
+    ap.add_argument("--method",      default="rev_tfidf")
+    ap.add_argument("--k",           type=int, default=5)
+    args = ap.parse_args(argv)
+    if args.endpoint == "similar_companies" and not args.ids:
+        ap.error("--ids is required for similar_companies")
+    asyncio.run(run(args))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+# model_registry.py — fitted Recommendation models keyed by data + pipeline fingerprint
+
+import hashlib, json, os, shutil, tempfile, time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+DEFAULT_ROOT    = os.path.join(".cache", "models")
+REGISTRY_FORMAT = 1
+
+
+def _versions():
+    out = {}
+    for mod in ("sklearn", "xgboost", "imblearn"):
+        try:
+            out[mod] = __import__(mod).__version__
+        except ImportError:
+            out[mod] = None
+    return out
+
+
+def data_fingerprint(df_all, df_map) -> str:
+    h = hashlib.sha1()
+    for obj in (df_all[["id", "Clean_rev", "Label"]], df_map):
+        h.update(pd.util.hash_pandas_object(obj, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def fingerprint(data_fp, feature_params, model_params) -> str:
+    """Registry key: changes with the data, the feature pipeline, hyperparameters or library versions."""
+    spec = json.dumps({
+        "format":   REGISTRY_FORMAT,
+        "data":     data_fp,
+        "features": feature_params,
+        "models":   model_params,
+        "libs":     _versions(),
+    }, sort_keys=True, default=str)
+    return hashlib.sha1(spec.encode()).hexdigest()[:16]
+
+
+class ModelRegistry:
+    """One directory per key: bundle.joblib (vectorizer, layout, models, results) + meta.json."""
+
+    def __init__(self, root=DEFAULT_ROOT):
+        self.root = root
+
+    def path(self, key):
+        return os.path.join(self.root, key)
+
+    def exists(self, key):
+        return os.path.exists(os.path.join(self.path(key), "meta.json"))
+
+    def save(self, key, bundle, meta=None):
+        os.makedirs(self.root, exist_ok=True)
+        tmp = tempfile.mkdtemp(prefix=f".{key}-", dir=self.root)
+        joblib.dump(bundle, os.path.join(tmp, "bundle.joblib"))
+        with open(os.path.join(tmp, "meta.json"), "w") as f:
+            json.dump({"key": key, "created": time.time(), **(meta or {})}, f, default=str)
+        if os.path.exists(self.path(key)):
+            shutil.rmtree(self.path(key), ignore_errors=True)
+        try:
+            os.replace(tmp, self.path(key))
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True)
+        return self.path(key)
+
+    def load(self, key, mmap_mode="r"):
+        if not self.exists(key):
+            return None
+        return joblib.load(os.path.join(self.path(key), "bundle.joblib"), mmap_mode=mmap_mode)
+
+    def save_array(self, key, name, arr):
+        # side arrays (e.g. per-review scores of the best model), memory-mapped on load
+        tmp = os.path.join(self.path(key), f".{name}.npy")
+        np.save(tmp, arr)
+        os.replace(tmp, os.path.join(self.path(key), f"{name}.npy"))
+
+    def load_array(self, key, name, mmap_mode="r"):
+        fp = os.path.join(self.path(key), f"{name}.npy")
+        return np.load(fp, mmap_mode=mmap_mode) if os.path.exists(fp) else None
+
+    def meta(self, key):
+        with open(os.path.join(self.path(key), "meta.json")) as f:
+            return json.load(f)
+
+    def keys(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(k for k in os.listdir(self.root) if not k.startswith(".") and self.exists(k))
+
+    def latest(self):
+        keys = self.keys()
+        return max(keys, key=lambda k: self.meta(k).get("created", 0)) if keys else None
+
+    def invalidate(self, key=None):
+        # drop one entry, or everything when key is None
+        for k in ([key] if key else self.keys()):
+            shutil.rmtree(self.path(k), ignore_errors=True)
+
+    def prune(self, max_entries, keep=()):
+        # keep the max_entries newest bundles (plus `keep`); only run on request,
+        # other sessions and the CLIs may still be using older keys
+        keep  = {keep} if isinstance(keep, str) else set(keep)
+        keys  = sorted(self.keys(), key=lambda k: self.meta(k).get("created", 0), reverse=True)
+        for k in keys[max_entries:]:
+            if k not in keep:
+                self.invalidate(k)
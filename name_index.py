@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+# name_index.py — case-insensitive substring lookup: company name → review rows
+
+import numpy as np
+
+
+def _grams(s, n=3):
+    return {s[i:i+n] for i in range(len(s) - n + 1)}
+
+
+class NameIndex:
+    """Trigram postings over company names plus a CSR-style company → review-row map."""
+
+    def __init__(self, names, row_codes, n=3):
+        # names: one per company; row_codes: company position for every review row (-1 = none)
+        self.n     = n
+        self.names = [str(x).lower() for x in names]
+        codes      = np.asarray(row_codes, dtype=np.int64)
+        valid      = np.flatnonzero(codes >= 0)
+        self.order   = valid[np.argsort(codes[valid], kind="stable")]
+        counts       = np.bincount(codes[valid], minlength=len(self.names))
+        self.offsets = np.concatenate([[0], np.cumsum(counts)])
+
+        post = {}
+        for c, nm in enumerate(self.names):
+            for g in _grams(nm, n):
+                post.setdefault(g, []).append(c)
+        self.postings = {g: np.asarray(cs, dtype=np.int64) for g, cs in post.items()}
+
+    @classmethod
+    def from_frames(cls, df_comp, df_all):
+        if "comp" in df_all:                       # company codes from ingest.compact
+            codes = df_all["comp"].to_numpy(dtype=np.int64)
+        else:
+            pos   = {cid: i for i, cid in enumerate(df_comp["id"].tolist())}
+            codes = df_all["id"].map(pos).fillna(-1).to_numpy(dtype=np.int64)
+        return cls(df_comp["Company Name"].tolist(), codes)
+
+    def companies(self, q) -> np.ndarray:
+        q = str(q).lower()
+        if len(q) >= self.n:
+            cand = None
+            for g in sorted(_grams(q, self.n), key=lambda g: len(self.postings.get(g, ()))):
+                p = self.postings.get(g)
+                if p is None:
+                    return np.empty(0, dtype=np.int64)
+                cand = p if cand is None else np.intersect1d(cand, p, assume_unique=True)
+                if not len(cand):
+                    return cand
+        else:
+            cand = np.arange(len(self.names))
+        # trigrams only narrow the candidates; confirm the substring itself
+        return np.asarray([c for c in cand if q in self.names[c]], dtype=np.int64)
+
+    def rows(self, q) -> np.ndarray:
+        """Review row positions (sorted) whose company name contains q, ignoring case."""
+        cs = self.companies(q)
+        if not len(cs):
+            return np.empty(0, dtype=np.int64)
+        parts = [self.order[self.offsets[c]:self.offsets[c+1]] for c in cs]
+        return np.sort(np.concatenate(parts))
@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+# profiling.py — per-stage wall/CPU time, peak RSS and cache hit/miss records
+#
+#   prof = Profiler()
+#   with use(prof), stage("load_all", cache=True):
+#       ...                       # code inside a cached function calls miss()
+#   prof.to_jsonl("profile.jsonl"); prof.to_chrome_trace("trace.json")
+#
+# Library modules call the module-level stage()/add()/miss(); they are no-ops
+# unless a Profiler is active on the current thread, so the CLIs and the service
+# pay nothing for the instrumentation.
+
+import json, logging, os, threading, time
+from collections import deque
+from contextlib import contextmanager
+
+log = logging.getLogger("itviec.profile")
+
+_local = threading.local()
+
+
+# ─── Memory ────────────────────────────────────────────────────────────────────
+def rss_mb():
+    # current RSS; falls back to the high-water mark where /proc is unavailable
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class _Sampler:
+    """One background thread sampling RSS while any stage is open."""
+
+    def __init__(self, interval):
+        self.interval, self.open, self.lock = interval, [], threading.Lock()
+        self.thread, self.stop = None, threading.Event()
+
+    def _run(self):
+        while not self.stop.wait(self.interval):
+            rss = rss_mb()
+            with self.lock:
+                for rec in self.open:
+                    rec["_peak"] = max(rec["_peak"], rss)
+
+    def enter(self, rec):
+        with self.lock:
+            self.open.append(rec)
+            if self.thread is None:
+                self.stop.clear()
+                self.thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+                self.thread.start()
+
+    def exit(self, rec):
+        with self.lock:
+            self.open.remove(rec)
+            th = self.thread if not self.open else None
+            if th is not None:
+                self.thread = None
+                self.stop.set()
+        if th is not None:
+            th.join()
+
+
+@contextmanager
+def measure(interval=0.01):
+    """Peak RSS growth of the block, sampled exactly like a Profiler stage's peak_mb
+    but not recorded anywhere (worker processes, work reported through add())."""
+    rec, sampler = {}, _Sampler(interval)
+    rec["_base"] = rec["_peak"] = rss_mb()
+    sampler.enter(rec)
+    try:
+        yield rec
+    finally:
+        sampler.exit(rec)
+        rec["peak_mb"] = max(0.0, max(rec.pop("_peak"), rss_mb()) - rec.pop("_base"))
+
+
+# ─── Profiler ──────────────────────────────────────────────────────────────────
+class Profiler:
+    def __init__(self, maxlen=5000, interval=0.01, log_path=None, **tags):
+        self.records  = deque(maxlen=maxlen)
+        self.tags     = tags                    # merged into every record (e.g. size=10_000)
+        self.run      = 0
+        self.log_path = log_path or os.environ.get("ITVIEC_PROFILE_LOG")
+        self.t0       = time.time()
+        self._stack   = []
+        self._sampler = _Sampler(interval)
+
+    def begin_run(self):
+        # Streamlit rerun → new run id; records of earlier runs are kept
+        self.run += 1
+        return self.run
+
+    def _emit(self, rec):
+        self.records.append(rec)
+        if log.isEnabledFor(logging.INFO):
+            log.info(json.dumps(rec, default=str))
+        if self.log_path:
+            with open(self.log_path, "a") as f:
+                f.write(json.dumps(rec, default=str) + "\n")
+
+    @contextmanager
+    def stage(self, name, cache=False, **fields):
+        """Time the block; yields the record so callers can attach counters."""
+        parent = self._stack[-1]["stage"] if self._stack else None
+        rec = {"stage": name, "run": self.run, "parent": parent, "depth": len(self._stack),
+               "start": time.time() - self.t0, "status": "ok", **self.tags, **fields}
+        if cache:
+            rec["cache"] = "hit"                # until miss() is called inside the block
+        rec["_base"] = rec["_peak"] = rss_mb()
+        self._stack.append(rec)
+        self._sampler.enter(rec)
+        w0, c0 = time.perf_counter(), time.process_time()
+        try:
+            yield rec
+        except BaseException as e:
+            rec["status"] = f"error: {e!r}"
+            raise
+        finally:
+            rec["wall_s"]  = time.perf_counter() - w0
+            rec["cpu_s"]   = time.process_time() - c0
+            self._sampler.exit(rec)
+            self._stack.pop()
+            rec["peak_mb"] = max(0.0, max(rec.pop("_peak"), rss_mb()) - rec.pop("_base"))
+            self._emit(rec)
+
+    def add(self, name, **fields):
+        """Record a stage measured elsewhere (worker process, Spark, cached run info)."""
+        parent = self._stack[-1]["stage"] if self._stack else None
+        self._emit({"stage": name, "run": self.run, "parent": parent, "depth": len(self._stack),
+                    "start": time.time() - self.t0, "status": "ok", **self.tags, **fields})
+
+    def miss(self):
+        for rec in reversed(self._stack):
+            if "cache" in rec:
+                rec["cache"] = "miss"
+                return
+
+    def last_run(self):
+        return [r for r in self.records if r["run"] == self.run]
+
+    # ─── Export ────────────────────────────────────────────────────────────────
+    def jsonl(self, records=None):
+        return "".join(json.dumps(r, default=str) + "\n" for r in (self.records if records is None else records))
+
+    def chrome_trace(self, records=None):
+        """Trace Event Format (chrome://tracing, Perfetto): one complete event per stage."""
+        pid, ev = os.getpid(), []
+        for r in (self.records if records is None else records):
+            args = {k: v for k, v in r.items() if k not in ("stage", "start", "wall_s")}
+            ev.append({"name": r["stage"], "cat": "stage", "ph": "X", "pid": pid, "tid": r["run"],
+                       "ts": round(r["start"] * 1e6), "dur": round((r.get("wall_s") or 0) * 1e6),
+                       "args": args})
+        return {"traceEvents": ev, "displayTimeUnit": "ms"}
+
+    def to_jsonl(self, path):
+        with open(path, "w") as f:
+            f.write(self.jsonl())
+
+    def to_chrome_trace(self, path):
+        with open(path, "w") as f:
+            json.dump(self.chrome_trace(), f, default=str)
+
+
+# ─── Module-level hooks (no-ops without an active profiler) ────────────────────
+def active():
+    return getattr(_local, "prof", None)
+
+
+def activate(prof):
+    # make prof the target of stage()/add()/miss() on this thread (None disables)
+    _local.prof = prof
+    return prof
+
+
+@contextmanager
+def use(prof):
+    prev, _local.prof = active(), prof
+    try:
+        yield prof
+    finally:
+        _local.prof = prev
+
+
+@contextmanager
+def stage(name, cache=False, **fields):
+    prof = active()
+    if prof is None:
+        yield {}
+        return
+    with prof.stage(name, cache, **fields) as rec:
+        yield rec
+
+
+def add(name, **fields):
+    prof = active()
+    if prof is not None:
+        prof.add(name, **fields)
+
+
+def miss():
+    prof = active()
+    if prof is not None:
+        prof.miss()
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+# score_batch.py — headless, streaming "Recommend?" scoring for large review files
+#
+#   python score_batch.py reviews.parquet scored.parquet --ratings Overview_Reviews.xlsx
+#
+# Input: CSV or Parquet with id + "What I liked" / "Suggestions for improvement"
+# (or an already cleaned Clean_rev column). Rows are read in fixed-size chunks and
+# cleaned, featurized and scored in a worker pool with a bounded number of chunks
+# in flight, so memory stays flat regardless of the input size.
+
+import argparse, os, sys, time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+TEXT_COLS = ["What I liked", "Suggestions for improvement"]
+
+_W = {}     # per-worker state, filled by _init
+
+
+# ─── I/O ───────────────────────────────────────────────────────────────────────
+def read_table(path, columns=None):
+    ext = os.path.splitext(path)[1].lower()
+    if ext in (".xlsx", ".xls"):
+        return pd.read_excel(path, usecols=columns)
+    if ext == ".parquet":
+        return pd.read_parquet(path, columns=columns)
+    return pd.read_csv(path, usecols=columns)
+
+
+def read_chunks(path, chunksize, columns=None):
+    if path.lower().endswith(".parquet"):
+        import pyarrow.parquet as pq
+        pf = pq.ParquetFile(path)
+        if columns is not None:
+            columns = [c for c in columns if c in pf.schema_arrow.names]
+        for batch in pf.iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunksize,
+                               usecols=(lambda c: c in columns) if columns is not None else None)
+
+
+class ChunkWriter:
+    def __init__(self, path):
+        self.path, self.pq, self.first = path, None, True
+
+    def write(self, df):
+        if self.path.lower().endswith(".parquet"):
+            import pyarrow as pa, pyarrow.parquet as pq
+            tbl = pa.Table.from_pandas(df, preserve_index=False)
+            if self.pq is None:
+                self.pq = pq.ParquetWriter(self.path, tbl.schema)
+            self.pq.write_table(tbl.cast(self.pq.schema))
+        else:
+            df.to_csv(self.path, mode="w" if self.first else "a", header=self.first, index=False)
+        self.first = False
+
+    def close(self):
+        if self.pq is not None:
+            self.pq.close()
+
+
+# ─── Worker ────────────────────────────────────────────────────────────────────
+def _init(registry_root, key, model_name, ratings_path, translator, batch_size):
+    from model_registry import ModelRegistry
+    from text_clean import stop_words
+    from training import best_model
+    bundle = ModelRegistry(registry_root).load(key)
+    _W["vec"]      = bundle["vectorizer"]
+    _W["num_cols"] = bundle["num_cols"]
+    _W["clf"]      = bundle["models"][model_name or best_model(bundle["results"])]
+    _W["map"]      = read_table(ratings_path) if ratings_path else pd.DataFrame({"id": []})
+    _W["batch"]    = batch_size
+    _W["nlp"], _W["sw"], _W["tr"] = None, stop_words(), None
+    if translator != "none":
+        from translation_cache import TranslationCache, cached_translator, make_backend
+        _W["tr"] = cached_translator(TranslationCache(), make_backend(translator))
+
+
+def _score_chunk(df):
+    from features import build_features
+    from text_clean import clean_series, load_nlp
+    if "Clean_rev" not in df.columns:
+        if _W["nlp"] is None:
+            _W["nlp"] = load_nlp()
+        text = df[TEXT_COLS[0]].fillna("").astype(str) + " " + df[TEXT_COLS[1]].fillna("").astype(str)
+        df["Clean_rev"] = clean_series(text, _W["nlp"], _W["sw"], translate=_W["tr"],
+                                       batch_size=_W["batch"])[0].to_numpy()
+    X, _, _ = build_features(df, _W["map"], _W["vec"], _W["num_cols"])
+    prob = _W["clf"].predict_proba(X)[:,1].astype(np.float32)
+    return prob
+
+
+# ─── Main ──────────────────────────────────────────────────────────────────────
+def main(argv=None):
+    from model_registry import DEFAULT_ROOT, ModelRegistry
+
+    ap = argparse.ArgumentParser(description="Stream-score reviews with a saved Recommend? classifier")
+    ap.add_argument("input",  help="CSV or Parquet of raw (or cleaned) reviews")
+    ap.add_argument("output", help="CSV or Parquet to write")
+    ap.add_argument("--ratings",    help="Overview_Reviews.xlsx/.csv/.parquet with numeric ratings by id "
+                                         "(required unless the model uses no rating columns)")
+    ap.add_argument("--registry",   default=DEFAULT_ROOT)
+    ap.add_argument("--key",        help="model registry key (default: most recent)")
+    ap.add_argument("--model",      help="model name, e.g. LR / XGB (default: best by Acc)")
+    ap.add_argument("--keep",       nargs="*", default=["id"], help="input columns copied to the output")
+    ap.add_argument("--chunksize",  type=int, default=20_000)
+    ap.add_argument("--workers",    type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--inflight",   type=int, default=None, help="max chunks in flight (default 2×workers)")
+    ap.add_argument("--nlp-batch",  type=int, default=1000)
+    ap.add_argument("--translator", default=os.environ.get("ITVIEC_TRANSLATOR", "google"),
+                    choices=["google", "offline", "none"])
+    args = ap.parse_args(argv)
+
+    reg = ModelRegistry(args.registry)
+    key = args.key or reg.latest()
+    if key is None:
+        ap.error(f"no trained models in {args.registry}; open the Recommendation page once or pass --key")
+    num_cols = reg.load(key)["num_cols"]
+    if num_cols and not args.ratings:
+        # without them every rating feature would silently be 0
+        ap.error(f"model {key} uses numeric ratings ({', '.join(num_cols)}); pass --ratings")
+
+    cols     = list(dict.fromkeys(["id", "Clean_rev", *TEXT_COLS, *args.keep]))
+    inflight = args.inflight or 2 * args.workers
+    writer   = ChunkWriter(args.output)
+    n, t0    = 0, time.perf_counter()
+
+    def _emit(out, fut):
+        nonlocal n
+        out["Recommend_prob"] = fut.result()
+        out["Recommend_pred"] = np.where(out["Recommend_prob"] > 0.5, "Yes", "No")
+        writer.write(out)
+        n += len(out)
+        dt = time.perf_counter() - t0
+        print(f"\r{n:,} rows · {n/dt:,.0f} rows/s", end="", file=sys.stderr, flush=True)
+
+    init = (args.registry, key, args.model, args.ratings, args.translator, args.nlp_batch)
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init, initargs=init) as ex:
+        pending = deque()
+        for chunk in read_chunks(args.input, args.chunksize, cols):
+            keep = chunk[[c for c in args.keep if c in chunk.columns]].copy()
+            pending.append((keep, ex.submit(_score_chunk, chunk)))
+            if len(pending) >= inflight:
+                _emit(*pending.popleft())
+        while pending:
+            _emit(*pending.popleft())
+    writer.close()
+
+    dt = time.perf_counter() - t0
+    print(f"\nscored {n:,} rows in {dt:.1f}s ({n/dt if dt else 0:,.0f} rows/s) with model {key}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,291 @@
+# -*- coding: utf-8 -*-
+# scoring_service.py — local HTTP/JSON scoring service with asyncio micro-batching
+#
+#   python scoring_service.py --port 8600 --ratings Overview_Reviews.xlsx
+#
+#   POST /score_reviews      {"reviews": [{"id": 12, "text": "..."} | {"id": 12, "clean": "..."}]}
+#   POST /similar_companies  {"id": 12, "method": "rev_tfidf", "k": 5}  or  {"queries": [...]}
+#   GET  /stats              latency percentiles, queue depth, batch sizes
+#   GET  /health
+#
+# Concurrent requests are coalesced into micro-batches (up to --max-batch items,
+# waiting at most --max-wait-ms) so predict_proba and the similarity products run
+# once per batch instead of once per request.
+
+import argparse, asyncio, json, sys, time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+
+# ─── Micro-batching ────────────────────────────────────────────────────────────
+class MicroBatcher:
+    """Queue single items; run fn(list_of_items) -> list_of_results on batches."""
+
+    def __init__(self, fn, max_batch=64, max_wait=0.005, executor=None, window=10_000):
+        self.fn, self.max_batch, self.max_wait = fn, max_batch, max_wait
+        self.executor  = executor
+        self.queue     = asyncio.Queue()
+        self.latencies = deque(maxlen=window)      # seconds, submit → result
+        self.sizes     = deque(maxlen=window)
+        self.requests  = 0
+        self.errors    = 0
+        self._task     = None
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def submit(self, item):
+        fut = asyncio.get_running_loop().create_future()
+        t0  = time.perf_counter()
+        await self.queue.put((item, fut))
+        self.requests += 1
+        try:
+            return await fut
+        finally:
+            self.latencies.append(time.perf_counter() - t0)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch    = [await self.queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                left = deadline - loop.time()
+                if left <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), left))
+                except asyncio.TimeoutError:
+                    break
+            self.sizes.append(len(batch))
+            items = [it for it, _ in batch]
+            try:
+                res = await loop.run_in_executor(self.executor, self.fn, items)
+            except Exception as e:
+                self.errors += len(batch)
+                for _, fut in batch:
+                    if not fut.done(): fut.set_exception(e)
+                continue
+            for (_, fut), r in zip(batch, res):
+                if not fut.done(): fut.set_result(r)
+
+    def stats(self):
+        lat = np.asarray(self.latencies) * 1000
+        pct = dict(zip(("p50", "p90", "p99"), np.percentile(lat, [50, 90, 99]).round(2).tolist())) if len(lat) else {}
+        return {
+            "requests":    self.requests,
+            "errors":      self.errors,
+            "queue_depth": self.queue.qsize(),
+            "batches":     len(self.sizes),
+            "mean_batch":  round(float(np.mean(self.sizes)), 2) if self.sizes else 0.0,
+            "latency_ms":  pct,
+        }
+
+
+# ─── Models ────────────────────────────────────────────────────────────────────
+class Scorer:
+    """Recommend? classifier from the model registry + optional similarity index."""
+
+    def __init__(self, registry_root=None, key=None, model=None, ratings=None, translator="none", sim=None):
+        from model_registry import DEFAULT_ROOT, ModelRegistry
+        from training import best_model
+        reg = ModelRegistry(registry_root or DEFAULT_ROOT)
+        self.key = key or reg.latest()
+        if self.key is None:
+            raise SystemExit("no trained models in the registry; open the Recommendation page once")
+        b = reg.load(self.key)
+        self.vec, self.num_cols = b["vectorizer"], b["num_cols"]
+        self.model_name = model or best_model(b["results"])
+        self.clf = b["models"][self.model_name]
+        if self.num_cols and not ratings:
+            # without them every rating feature would silently be 0
+            raise SystemExit(f"model {self.key} uses numeric ratings ({', '.join(self.num_cols)}); pass --ratings")
+        self.ratings = pd.DataFrame({"id": []})
+        if ratings:
+            from score_batch import read_table
+            self.ratings = read_table(ratings)
+        self.sim  = sim
+        self._nlp = None
+        self._tr  = None
+        if translator != "none":
+            from translation_cache import TranslationCache, cached_translator, make_backend
+            self._tr = cached_translator(TranslationCache(), make_backend(translator))
+
+    def _clean(self, texts):
+        from text_clean import clean_series, load_nlp, stop_words
+        if self._nlp is None:
+            self._nlp, self._sw = load_nlp(), stop_words()
+        return clean_series(texts, self._nlp, self._sw, translate=self._tr)[0].tolist()
+
+    def score_reviews(self, items):
+        from features import build_features
+        clean = [it.get("clean") for it in items]
+        raw   = [i for i, c in enumerate(clean) if c is None]
+        if raw:
+            for i, c in zip(raw, self._clean([str(items[i].get("text", "")) for i in raw])):
+                clean[i] = c
+        df = pd.DataFrame({"id": [it.get("id") for it in items], "Clean_rev": clean})
+        X  = build_features(df, self.ratings, self.vec, self.num_cols)[0]
+        return self.clf.predict_proba(X)[:,1].astype(float).tolist()
+
+    def similar_companies(self, items):
+        from sim_index import topk_rows
+        if self.sim is None:
+            raise RuntimeError("no similarity index built yet")
+        out = [None] * len(items)
+        by_method = {}
+        for j, it in enumerate(items):
+            by_method.setdefault(it.get("method", "rev_tfidf"), []).append(j)
+        for method, js in by_method.items():
+            rows = np.array([self.sim.pos[items[j]["id"]] for j in js])
+            k    = max(int(items[j].get("k", 5)) for j in js)
+            # one (batch × n) product per method for the whole micro-batch
+            idx, sc = topk_rows(self.sim.block_scores(method, rows), k, exclude=rows)
+            for r, j in enumerate(js):
+                top   = idx[r][:int(items[j].get("k", 5))]
+                names = [None] * len(top) if self.sim.names is None else self.sim.names[top].tolist()
+                out[j] = [{"id": i, "name": nm, "score": float(s)}
+                          for i, nm, s in zip(self.sim.ids[top].tolist(), names, sc[r])]
+        return out
+
+
+# ─── HTTP ──────────────────────────────────────────────────────────────────────
+# Items are checked before they are queued: a malformed one would otherwise raise
+# inside the batch function and fail every request sharing its micro-batch.
+def _review_error(r):
+    if not isinstance(r, dict):
+        return f"review must be an object: {r!r}"
+    for f in ("text", "clean"):
+        if r.get(f) is not None and not isinstance(r[f], str):
+            return f"review {f!r} must be a string: {r[f]!r}"
+    if isinstance(r.get("id"), (dict, list)):
+        return f"review id must be a scalar: {r['id']!r}"
+    return None
+
+
+def _query_error(q, sim):
+    if not isinstance(q, dict):
+        return f"query must be an object: {q!r}"
+    cid, method, k = q.get("id"), q.get("method", "rev_tfidf"), q.get("k", 5)
+    if sim is None or isinstance(cid, (dict, list)) or cid not in sim.pos \
+            or not isinstance(method, str) or method not in sim.mats:
+        return f"unknown company id / method: {cid!r} {method!r}"
+    if isinstance(k, bool) or not isinstance(k, int) or k < 1:
+        return f"k must be a positive integer: {k!r}"
+    return None
+
+
+class Service:
+    def __init__(self, scorer, max_batch=64, max_wait=0.005, threads=2):
+        ex = ThreadPoolExecutor(max_workers=threads)
+        self.scorer   = scorer
+        self.batchers = {
+            "score_reviews":     MicroBatcher(scorer.score_reviews, max_batch, max_wait, ex),
+            "similar_companies": MicroBatcher(scorer.similar_companies, max_batch, max_wait, ex),
+        }
+        self.started = time.time()
+
+    def stats(self):
+        return {"uptime_s": round(time.time() - self.started, 1), "model": self.scorer.model_name,
+                "registry_key": self.scorer.key, **{k: b.stats() for k, b in self.batchers.items()}}
+
+    async def route(self, method, path, body):
+        if method == "GET" and path == "/health":
+            return 200, {"ok": True}
+        if method == "GET" and path == "/stats":
+            return 200, self.stats()
+        if method == "POST" and not isinstance(body, dict):
+            return 400, {"error": "request body must be a JSON object"}
+        if method == "POST" and path == "/score_reviews":
+            reviews = body.get("reviews", [body] if "text" in body or "clean" in body else [])
+            if not isinstance(reviews, list):
+                return 400, {"error": "reviews must be a list"}
+            for r in reviews:
+                if (err := _review_error(r)):
+                    return 400, {"error": err}
+            probs   = await asyncio.gather(*(self.batchers["score_reviews"].submit(r) for r in reviews))
+            return 200, {"probs": probs, "model": self.scorer.model_name}
+        if method == "POST" and path == "/similar_companies":
+            qs  = body.get("queries", [body])
+            if not isinstance(qs, list):
+                return 400, {"error": "queries must be a list"}
+            # reject bad ids/methods/k up front so one bad query cannot fail a shared batch
+            for q in qs:
+                if (err := _query_error(q, self.scorer.sim)):
+                    return 400, {"error": err}
+            res = await asyncio.gather(*(self.batchers["similar_companies"].submit(q) for q in qs))
+            return 200, {"results": res if "queries" in body else res[0]}
+        return 404, {"error": f"no route {method} {path}"}
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                method, path, _ = line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while (h := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    k, _, v = h.decode("latin-1").partition(":")
+                    headers[k.strip().lower()] = v.strip()
+                n    = int(headers.get("content-length", 0))
+                raw  = await reader.readexactly(n) if n else b""
+                try:
+                    code, obj = await self.route(method, path.split("?")[0], json.loads(raw) if raw else {})
+                except (KeyError, ValueError) as e:
+                    code, obj = 400, {"error": repr(e)}
+                except Exception as e:
+                    code, obj = 500, {"error": repr(e)}
+                data = json.dumps(obj).encode()
+                writer.write(b"HTTP/1.1 %d %s\r\nContent-Type: application/json\r\nContent-Length: %d\r\n\r\n"
+                             % (code, b"OK" if code == 200 else b"ERR", len(data)) + data)
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (asyncio.IncompleteReadError, ConnectionResetError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host, port):
+        for b in self.batchers.values():
+            b.start()
+        server = await asyncio.start_server(self.handle, host, port)
+        print(f"scoring service on http://{host}:{port} (model {self.scorer.model_name}, key {self.scorer.key})",
+              file=sys.stderr)
+        async with server:
+            await server.serve_forever()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Local Recommend? / similar-company scoring service")
+    ap.add_argument("--host",        default="127.0.0.1")
+    ap.add_argument("--port",        type=int, default=8600)
+    ap.add_argument("--registry",    default=None)
+    ap.add_argument("--key",         help="model registry key (default: most recent)")
+    ap.add_argument("--model",       help="model name (default: best by Acc)")
+    ap.add_argument("--ratings",     help="Overview_Reviews.xlsx/.csv/.parquet with numeric ratings by id "
+                                          "(required unless the model uses no rating columns)")
+    ap.add_argument("--sim-index",   help="similarity index dir (default: most recent under .cache/sim_index)")
+    ap.add_argument("--max-batch",   type=int,   default=64)
+    ap.add_argument("--max-wait-ms", type=float, default=5.0)
+    ap.add_argument("--threads",     type=int,   default=2, help="executor threads running batches")
+    ap.add_argument("--translator",  default="none", choices=["google", "offline", "none"])
+    args = ap.parse_args(argv)
+
+    from sim_index import SimIndex
+    sim = SimIndex.load(args.sim_index) if args.sim_index else SimIndex.latest()
+    scorer = Scorer(args.registry, args.key, args.model, args.ratings, args.translator, sim)
+    svc = Service(scorer, args.max_batch, args.max_wait_ms / 1000, args.threads)
+    try:
+        asyncio.run(svc.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
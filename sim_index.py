@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+# sim_index.py — Similarity Search artifacts, fitted once per dataset version
+
+import hashlib, json, os, shutil, tempfile
+
+import joblib
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.preprocessing import normalize
+
+from embeddings import doc_embeddings
+from profiling import stage
+
+DEFAULT_ROOT = os.path.join(".cache", "sim_index")
+INDEX_FORMAT = 2
+CHUNK_BYTES  = 256 * 2**20      # working-memory budget per query_all block
+SCORE_BYTES  = 12               # per score: float32 block + int64 argpartition indices
+
+# method key → label shown on the Similarity Search page
+METHODS = {
+    "num":         "Numeric Ratings",
+    "desc_tfidf":  "Overview TF-IDF",
+    "desc_gensim": "Overview Gensim-TFIDF",
+    "desc_w2v":    "Overview Word2Vec",
+    "desc_ft":     "Overview FastText",
+    "rev_tfidf":   "Reviews TF-IDF",
+    "rev_gensim":  "Reviews Gensim-TFIDF",
+    "rev_w2v":     "Reviews Word2Vec",
+    "rev_ft":      "Reviews FastText",
+}
+
+TFIDF_PARAMS = dict(ngram_range=(1, 2), max_features=3000)
+EMB_PARAMS   = dict(vector_size=100, window=5, min_count=2, epochs=10)
+
+
+# ─── Dataset version ───────────────────────────────────────────────────────────
+def group_reviews(df_all, ids) -> pd.Series:
+    # one document per company, in df_comp order
+    return df_all.groupby("id")["Clean_rev"].apply(" ".join).reindex(ids).fillna("")
+
+
+def rating_matrix(df_map, ids) -> np.ndarray:
+    return (df_map.set_index("id").select_dtypes(include="number")
+            .reindex(ids).fillna(0).to_numpy(dtype=np.float32))
+
+
+def dataset_version(df_comp, df_map, df_all) -> str:
+    h = hashlib.sha1(repr((INDEX_FORMAT, TFIDF_PARAMS, EMB_PARAMS)).encode())
+    for obj in (df_comp[["id", "Clean_desc"]], df_map, df_all[["id", "Clean_rev"]]):
+        h.update(pd.util.hash_pandas_object(obj, index=False).to_numpy().tobytes())
+    return h.hexdigest()[:16]
+
+
+# ─── Builders ──────────────────────────────────────────────────────────────────
+def gensim_tfidf(toks):
+    from gensim import corpora, models
+    from gensim.matutils import corpus2csc
+    dct  = corpora.Dictionary(toks)
+    corp = [dct.doc2bow(t) for t in toks]
+    mgt  = models.TfidfModel(corp)
+    return corpus2csc(mgt[corp], num_terms=len(dct), num_docs=len(corp)).T.tocsr()
+
+
+def _text_block(docs, prefix):
+    from gensim.models import Word2Vec, FastText
+    toks = [d.split() for d in docs]
+    tf   = TfidfVectorizer(**TFIDF_PARAMS)
+    out  = {}
+    with stage(f"sim: {prefix}_tfidf"):
+        out[f"{prefix}_tfidf"] = tf.fit_transform(docs)
+    with stage(f"sim: {prefix}_gensim"):
+        out[f"{prefix}_gensim"] = gensim_tfidf(toks)
+    for key, cls in (("w2v", Word2Vec), ("ft", FastText)):
+        with stage(f"sim: {prefix}_{key}"):
+            out[f"{prefix}_{key}"] = doc_embeddings(toks, cls(toks, **EMB_PARAMS), tf.idf_, tf.vocabulary_)
+    return out, tf
+
+
+def build_index(df_comp, df_map, df_all, root=DEFAULT_ROOT, version=None, rev_grp=None) -> str:
+    """Fit every Similarity Search representation and write it under root/version.
+
+    rev_grp: optional precomputed per-company review documents (incremental ingest).
+    """
+    version = version or dataset_version(df_comp, df_map, df_all)
+    path    = os.path.join(root, version)
+    if os.path.exists(os.path.join(path, "meta.json")):
+        return path
+
+    ids     = df_comp["id"].to_numpy()
+    rev_grp = group_reviews(df_all, ids) if rev_grp is None else rev_grp.reindex(ids).fillna("")
+    with stage("sim: num"):
+        mats = {"num": rating_matrix(df_map, ids)}
+    desc, tf_desc = _text_block(df_comp["Clean_desc"].fillna("").tolist(), "desc")
+    revs, tf_rev  = _text_block(rev_grp.tolist(), "rev")
+    mats.update(desc); mats.update(revs)
+
+    os.makedirs(root, exist_ok=True)
+    tmp  = tempfile.mkdtemp(prefix=f".{version}-", dir=root)
+    with stage("sim: write index"):
+        meta = {"version": version, "format": INDEX_FORMAT, "n": len(ids), "methods": {}}
+        for key, M in mats.items():
+            if sp.issparse(M):
+                M = normalize(sp.csr_matrix(M, dtype=np.float32))
+                for part in ("data", "indices", "indptr"):
+                    np.save(os.path.join(tmp, f"{key}.{part}.npy"), getattr(M, part))
+                meta["methods"][key] = {"kind": "sparse", "shape": list(M.shape)}
+            else:
+                np.save(os.path.join(tmp, f"{key}.npy"), normalize(np.asarray(M, dtype=np.float32)))
+                meta["methods"][key] = {"kind": "dense", "shape": list(M.shape)}
+        np.save(os.path.join(tmp, "ids.npy"), ids)
+        if "Company Name" in df_comp:
+            np.save(os.path.join(tmp, "names.npy"), df_comp["Company Name"].astype(str).to_numpy(dtype="U"))
+        joblib.dump({"desc": tf_desc, "rev": tf_rev}, os.path.join(tmp, "vectorizers.joblib"))
+        with open(os.path.join(tmp, "meta.json"), "w") as f:
+            json.dump(meta, f)
+
+    try:
+        os.replace(tmp, path)
+    except OSError:
+        # another process finished the same version first
+        shutil.rmtree(tmp, ignore_errors=True)
+    return path
+
+
+# ─── Top-k helpers ─────────────────────────────────────────────────────────────
+def topk_rows(S, k, exclude=None, copy=True):
+    # S: (m, n) scores → (m, k) column indices and scores, best first.
+    # copy=False lets a float32 S be overwritten (negated in place): besides S the
+    # only (m, n) allocation is argpartition's int64 index array.
+    S = np.array(S, dtype=np.float32) if copy else np.asarray(S, dtype=np.float32)
+    if exclude is not None:
+        S[np.arange(len(S)), exclude] = -np.inf
+    k = min(k, S.shape[1] - (exclude is not None))
+    if k <= 0:
+        return np.empty((len(S), 0), dtype=np.int64), np.empty((len(S), 0), dtype=np.float32)
+    np.negative(S, out=S)
+    part  = np.argpartition(S, k - 1, axis=1)[:, :k]
+    psc   = np.take_along_axis(S, part, axis=1)
+    order = np.argsort(psc, axis=1, kind="stable")
+    return np.take_along_axis(part, order, axis=1), -np.take_along_axis(psc, order, axis=1)
+
+
+def _dense(x):
+    return np.asarray(x.toarray() if sp.issparse(x) else x, dtype=np.float32)
+
+
+class AnnIndex:
+    # optional hnswlib backend for the dense Word2Vec/FastText embeddings
+    def __init__(self, X, path=None, M=16, ef_construction=200):
+        import hnswlib
+        n, d = X.shape
+        self.index = hnswlib.Index(space="ip", dim=d)
+        if path and os.path.exists(path):
+            self.index.load_index(path, max_elements=n)
+        else:
+            self.index.init_index(max_elements=n, ef_construction=ef_construction, M=M)
+            self.index.add_items(np.asarray(X, dtype=np.float32), np.arange(n))
+            if path:
+                self.index.save_index(path)
+
+    def query(self, X, k):
+        self.index.set_ef(max(50, 2 * k))
+        lab, dist = self.index.knn_query(np.atleast_2d(X), k=k)
+        return lab.astype(np.int64), (1.0 - dist).astype(np.float32)   # ip distance = 1 - dot
+
+
+# ─── Loaded index ──────────────────────────────────────────────────────────────
+class SimIndex:
+    def __init__(self, path, meta, ids, mats):
+        self.path, self.meta, self.ids, self.mats = path, meta, ids, mats
+        self.version = meta["version"]
+        self.pos     = {cid: i for i, cid in enumerate(ids.tolist())}
+        self.names   = None
+        self._vec    = None
+        self._ann    = {}
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        mode = "r" if mmap else None
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        mats = {}
+        for key, m in meta["methods"].items():
+            if m["kind"] == "sparse":
+                parts = [np.load(os.path.join(path, f"{key}.{p}.npy"), mmap_mode=mode)
+                         for p in ("data", "indices", "indptr")]
+                mats[key] = sp.csr_matrix(tuple(parts), shape=tuple(m["shape"]), copy=False)
+            else:
+                mats[key] = np.load(os.path.join(path, f"{key}.npy"), mmap_mode=mode)
+        ids = np.load(os.path.join(path, "ids.npy"), allow_pickle=True)
+        obj = cls(path, meta, ids, mats)
+        if os.path.exists(os.path.join(path, "names.npy")):
+            obj.names = np.load(os.path.join(path, "names.npy"))
+        return obj
+
+    @classmethod
+    def latest(cls, root=DEFAULT_ROOT, mmap=True):
+        # most recently built index under root (for tools running outside the app)
+        paths = [os.path.join(root, d) for d in os.listdir(root) if not d.startswith(".")] if os.path.isdir(root) else []
+        paths = [p for p in paths if os.path.exists(os.path.join(p, "meta.json"))]
+        return cls.load(max(paths, key=os.path.getmtime), mmap) if paths else None
+
+    @property
+    def vectorizers(self):
+        if self._vec is None:
+            self._vec = joblib.load(os.path.join(self.path, "vectorizers.joblib"))
+        return self._vec
+
+    def __len__(self):
+        return len(self.ids)
+
+    def row_scores(self, method, i) -> np.ndarray:
+        # rows are L2-normalized, so one row · matrixᵀ is the cosine row
+        M = self.mats[method]
+        return _dense(M @ M[i].T).ravel()
+
+    def block_scores(self, method, rows) -> np.ndarray:
+        # (len(rows), n) cosine block for several query rows at once
+        M = self.mats[method]
+        return _dense(M[np.asarray(rows)] @ M.T)
+
+    def ann(self, method):
+        if method not in self._ann:
+            if self.meta["methods"][method]["kind"] != "dense":
+                raise ValueError(f"ANN backend only supports dense methods, not {method!r}")
+            self._ann[method] = AnnIndex(self.mats[method], os.path.join(self.path, f"{method}.hnsw"))
+        return self._ann[method]
+
+    def query(self, cid, method, k=5, ann=False):
+        """Top-k companies most similar to company id `cid` (itself excluded) → (rows, scores)."""
+        i = self.pos[cid]
+        if ann and self.meta["methods"][method]["kind"] == "dense":
+            try:
+                lab, sc = self.ann(method).query(self.mats[method][i], min(k + 1, len(self)))
+                keep = lab[0] != i
+                return lab[0][keep][:k], sc[0][keep][:k]
+            except ImportError:
+                pass                                  # hnswlib not installed → exact
+        rows, sc = topk_rows(self.row_scores(method, i)[None, :], k, exclude=np.array([i]))
+        return rows[0], sc[0]
+
+    def query_all(self, method, k=5, max_bytes=CHUNK_BYTES):
+        """Top-k for every company, scored in row chunks of at most max_bytes working memory."""
+        M, n  = self.mats[method], len(self)
+        chunk = max(1, int(max_bytes // (SCORE_BYTES * max(n, 1))))
+        MT    = M.T.tocsc() if sp.issparse(M) else M.T
+        rows  = np.empty((n, min(k, n - 1)), dtype=np.int64)
+        score = np.empty(rows.shape, dtype=np.float32)
+        for a in range(0, n, chunk):
+            b = min(a + chunk, n)
+            r, s = topk_rows(_dense(M[a:b] @ MT), k, exclude=np.arange(a, b), copy=False)
+            rows[a:b], score[a:b] = r, s
+        return rows, score
@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+# spark_backend.py — long-lived local Spark session + persisted MLlib pipeline/models
+
+import hashlib, json, os, threading, time
+from contextlib import contextmanager
+
+import pandas as pd
+
+from profiling import stage as _stage
+
+DEFAULT_ROOT = os.path.join(".cache", "spark")
+SPARK_PARAMS = dict(num_features=3000, split=[0.8, 0.2], seed=42)
+SPARK_MODELS = ("SparkLR", "SparkDT", "SparkRF")
+SPARK_CONF   = {
+    "spark.sql.execution.arrow.pyspark.enabled":          "true",
+    "spark.sql.execution.arrow.pyspark.fallback.enabled": "true",
+    "spark.ui.showConsoleProgress":                       "false",
+    "spark.sql.shuffle.partitions":                       "8",
+}
+
+_lock    = threading.Lock()
+_session = None
+_frames  = {}       # key → (train, test) DataFrames persisted in the live session (latest key only)
+
+
+def get_session(app_name="itviec_cls", master="local[*]", conf=SPARK_CONF):
+    """Process-wide SparkSession; created once, never stopped between reruns."""
+    global _session
+    with _lock:
+        if _session is None or _session.sparkContext._jsc is None:
+            from pyspark.sql import SparkSession
+            b = SparkSession.builder.appName(app_name).master(master)
+            for k, v in conf.items():
+                b = b.config(k, v)
+            _session = b.getOrCreate()
+            _frames.clear()
+        return _session
+
+
+def stop_session():
+    global _session
+    with _lock:
+        if _session is not None:
+            _session.stop()
+        _session = None
+        _frames.clear()
+
+
+def data_key(df_all, params=SPARK_PARAMS) -> str:
+    h = hashlib.sha1(json.dumps(params, sort_keys=True).encode())
+    h.update(pd.util.hash_pandas_object(df_all[["Clean_rev", "Label"]], index=False).to_numpy().tobytes())
+    return h.hexdigest()[:16]
+
+
+class StageTimer(dict):
+    @contextmanager
+    def __call__(self, stage):
+        t0 = time.perf_counter()
+        try:
+            with _stage(f"spark: {stage}"):
+                yield
+        finally:
+            self[stage] = self.get(stage, 0.0) + time.perf_counter() - t0
+
+
+def _estimators():
+    from pyspark.ml.classification import (LogisticRegression as SparkLR, DecisionTreeClassifier as SparkDT,
+                                           RandomForestClassifier as SparkRF)
+    return {
+        "SparkLR": SparkLR(labelCol="label", featuresCol="features"),
+        "SparkDT": SparkDT(labelCol="label", featuresCol="features"),
+        "SparkRF": SparkRF(labelCol="label", featuresCol="features")
+    }
+
+
+def _model_classes():
+    from pyspark.ml.classification import (LogisticRegressionModel, DecisionTreeClassificationModel,
+                                           RandomForestClassificationModel)
+    return {"SparkLR": LogisticRegressionModel, "SparkDT": DecisionTreeClassificationModel,
+            "SparkRF": RandomForestClassificationModel}
+
+
+def _feature_pipeline(params):
+    from pyspark.ml import Pipeline
+    from pyspark.ml.feature import RegexTokenizer, StopWordsRemover, HashingTF, IDF
+    tok  = RegexTokenizer(inputCol="text",    outputCol="words",      pattern="\\W+")
+    rem  = StopWordsRemover(inputCol="words",  outputCol="filtered")
+    htf  = HashingTF(inputCol="filtered",      outputCol="rawFeatures", numFeatures=params["num_features"])
+    idf  = IDF(inputCol="rawFeatures",         outputCol="features")
+    return Pipeline(stages=[tok, rem, htf, idf])
+
+
+def _evict_frames():
+    # only one dataset's frames stay in executor memory
+    for tr, te in _frames.values():
+        tr.unpersist(); te.unpersist()
+    _frames.clear()
+
+
+def _frames_for(spark, df_all, key, path, params, timer):
+    # fitted feature pipeline (disk) → transformed train/test frames (cached in the session)
+    if key in _frames:
+        return _frames[key]
+    _evict_frames()
+    from pyspark.ml import PipelineModel
+    with timer("to_spark (arrow)"):
+        sdf = spark.createDataFrame(
+            df_all[["Clean_rev","Label"]]
+            .astype({"Clean_rev": object, "Label": "int32"})
+            .rename(columns={"Clean_rev":"text","Label":"label"})
+        )
+    pipe_path = os.path.join(path, "pipeline")
+    if os.path.exists(pipe_path):
+        with timer("pipeline_load"):
+            pm = PipelineModel.load(pipe_path)
+    else:
+        with timer("pipeline_fit"):
+            pm = _feature_pipeline(params).fit(sdf)
+            pm.write().overwrite().save(pipe_path)
+    with timer("transform+cache"):
+        data   = pm.transform(sdf).select("features","label")
+        tr, te = data.randomSplit(params["split"], seed=params["seed"])
+        tr, te = tr.cache(), te.cache()
+        tr.count(); te.count()
+    _frames[key] = (tr, te)
+    return tr, te
+
+
+def train_spark_models(df_all, params=SPARK_PARAMS, root=DEFAULT_ROOT, spark=None):
+    """→ (metrics, predictions, stage timings). Everything fitted is reused from root/<key>."""
+    timer = StageTimer()
+    key   = data_key(df_all, params)
+    path  = os.path.join(root, key)
+    mfile = os.path.join(path, "metrics.json")
+    names = SPARK_MODELS
+
+    if os.path.exists(mfile) and all(os.path.exists(os.path.join(path, f"{nm}.preds.parquet")) for nm in names):
+        with timer("load_results"):
+            with open(mfile) as f:
+                metrics = json.load(f)
+            preds = {nm: pd.read_parquet(os.path.join(path, f"{nm}.preds.parquet")) for nm in names}
+        return metrics, preds, dict(timer)
+
+    from pyspark.ml.evaluation import BinaryClassificationEvaluator, MulticlassClassificationEvaluator
+    from pyspark.ml.functions import vector_to_array
+    from pyspark.sql.functions import col
+
+    os.makedirs(path, exist_ok=True)
+    if spark is None:
+        with timer("session"):
+            spark = get_session()
+    tr, te = _frames_for(spark, df_all, key, path, params, timer)
+
+    ev_acc  = MulticlassClassificationEvaluator(labelCol="label", predictionCol="prediction", metricName="accuracy")
+    ev_prec = MulticlassClassificationEvaluator(labelCol="label", predictionCol="prediction", metricName="weightedPrecision")
+    ev_rec  = MulticlassClassificationEvaluator(labelCol="label", predictionCol="prediction", metricName="weightedRecall")
+    ev_f1   = MulticlassClassificationEvaluator(labelCol="label", predictionCol="prediction", metricName="f1")
+    ev_auc  = BinaryClassificationEvaluator(   labelCol="label", rawPredictionCol="probability", metricName="areaUnderROC")
+
+    classes = _model_classes()
+    sp_metrics, sp_preds = {}, {}
+    for nm, est in _estimators().items():
+        mpath = os.path.join(path, nm)
+        if os.path.exists(mpath):
+            with timer(f"{nm} load"):
+                m = classes[nm].load(mpath)
+        else:
+            with timer(f"{nm} fit"):
+                m = est.fit(tr)
+                m.write().overwrite().save(mpath)
+        with timer(f"{nm} evaluate"):
+            prd = m.transform(te).withColumn("prediction", col("prediction").cast("double")).cache()
+            sp_metrics[nm] = {
+                "Acc":  ev_acc.evaluate(prd),
+                "Prec": ev_prec.evaluate(prd),
+                "Rec":  ev_rec.evaluate(prd),
+                "F1":   ev_f1.evaluate(prd),
+                "AUC":  ev_auc.evaluate(prd)
+            }
+        with timer(f"{nm} to_pandas (arrow)"):
+            # plain double columns keep the transfer on the Arrow path (VectorUDT would not)
+            sp_preds[nm] = prd.select("label", "prediction",
+                                      vector_to_array("probability")[1].alias("prob")).toPandas()
+            prd.unpersist()
+        sp_preds[nm].to_parquet(os.path.join(path, f"{nm}.preds.parquet"), index=False)
+
+    with open(mfile, "w") as f:
+        json.dump(sp_metrics, f)
+    return sp_metrics, sp_preds, dict(timer)
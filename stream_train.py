@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+# stream_train.py — out-of-core Recommendation training: hashed features + partial_fit
+#
+#   python stream_train.py reviews_clean.parquet --ratings Overview_Reviews.xlsx
+#
+# Alternative to split_resample + train_sk_models when the TF-IDF matrix and its
+# SMOTE copy do not fit in memory. Clean_rev is hashed chunk by chunk (no fitted
+# vocabulary), the company ratings are gathered per chunk, and incremental
+# learners are updated with partial_fit. Class imbalance is handled with balanced
+# sample weights instead of synthetic rows. The bundle has the same layout as the
+# batch one, so score_batch / scoring_service / the Interactive tab use it as is.
+
+import argparse, hashlib, sys, time
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from features import build_features, rating_table
+from profiling import measure, stage
+from training import METRICS, metric_row
+
+STREAM_PARAMS = dict(n_features=2**18, chunk=20_000, epochs=3, test_size=0.2, random_state=42)
+STREAM_MODEL_PARAMS = {
+    "SGD-log":   dict(loss="log_loss", alpha=1e-5),
+    "SGD-huber": dict(loss="modified_huber", alpha=1e-5),
+    "NB":        dict(alpha=0.1),
+}
+CLASSES = np.array([0, 1])
+
+
+# ─── Features ──────────────────────────────────────────────────────────────────
+def hasher(params=STREAM_PARAMS):
+    from sklearn.feature_extraction.text import HashingVectorizer
+    # stateless (nothing to fit) and non-negative, so naive Bayes can share it
+    return HashingVectorizer(n_features=params["n_features"], alternate_sign=False, norm="l2",
+                             dtype=np.float32)
+
+
+def rating_scale(df_map, n_text, num_cols) -> np.ndarray:
+    # column multipliers: 1 for the hashed text, 1/max|rating| for the ratings
+    m = rating_table(df_map).reindex(columns=num_cols).abs().max().replace(0, 1).fillna(1)
+    return np.concatenate([np.ones(n_text), 1 / m.to_numpy()]).astype(np.float32)
+
+
+def _scaled(X, scale):
+    return sp.csr_matrix(X.multiply(scale), dtype=np.float32)
+
+
+class Scaled:
+    """A fitted classifier behind the fixed column scaling used during training."""
+
+    def __init__(self, clf, scale):
+        self.clf, self.scale = clf, scale
+
+    @property
+    def classes_(self):
+        return self.clf.classes_
+
+    def predict(self, X):
+        return self.clf.predict(_scaled(X, self.scale))
+
+    def predict_proba(self, X):
+        return self.clf.predict_proba(_scaled(X, self.scale))
+
+
+def make_stream_model(name, params, random_state=42):
+    kind = name.split("-")[0]
+    if kind == "SGD":
+        from sklearn.linear_model import SGDClassifier
+        return SGDClassifier(random_state=random_state, **params)
+    if kind == "NB":
+        from sklearn.naive_bayes import MultinomialNB
+        return MultinomialNB(**params)
+    raise ValueError(f"unknown streaming model: {name!r}")
+
+
+# ─── Chunks ────────────────────────────────────────────────────────────────────
+def frame_chunks(df, chunk):
+    # in-memory df_all as a chunk source (the app); files use score_batch.read_chunks
+    return lambda: (df.iloc[a:a+chunk] for a in range(0, len(df), chunk))
+
+
+def _labels(df) -> np.ndarray:
+    if "Label" in df:
+        return df["Label"].to_numpy(dtype=np.int64)
+    return (df["Recommend?"].astype(str).str.lower() == "yes").to_numpy(dtype=np.int64)
+
+
+def _is_test(n, i, params):
+    # per-chunk split seeded by the chunk number: the same rows are held out every pass
+    return np.random.default_rng([params["random_state"], i]).random(n) < params["test_size"]
+
+
+def class_weights(chunks, params=STREAM_PARAMS) -> np.ndarray:
+    """'balanced' weights (n / (2 · count)) from one pass over the training labels."""
+    counts = np.zeros(2)
+    for i, df in enumerate(chunks()):
+        counts += np.bincount(_labels(df)[~_is_test(len(df), i, params)], minlength=2)[:2]
+    return counts.sum() / (2 * np.maximum(counts, 1))
+
+
+# ─── Training ──────────────────────────────────────────────────────────────────
+def train_streaming(chunks, df_map, params=STREAM_PARAMS, models=STREAM_MODEL_PARAMS):
+    """chunks() → fresh iterator of DataFrames (id, Clean_rev, Label or Recommend?).
+
+    Returns a registry bundle: vectorizer, num_cols, models, results, runs, y_te.
+    """
+    with measure() as mem:
+        bundle = _train_streaming(chunks, df_map, params, models)
+    for r in bundle["runs"].values():
+        r["PeakMB"] = mem["peak_mb"]            # the models train side by side: one shared peak
+    return bundle
+
+
+def _train_streaming(chunks, df_map, params, models):
+    hv       = hasher(params)
+    num_cols = list(rating_table(df_map).columns)
+    scale    = rating_scale(df_map, params["n_features"], num_cols)
+    with stage("stream: class weights"):
+        w = class_weights(chunks, params)
+    clfs   = {nm: make_stream_model(nm, kw, params["random_state"]) for nm, kw in models.items()}
+    epochs = {nm: 1 if nm.startswith("NB") else params["epochs"] for nm in clfs}   # NB counts, so one pass
+    fit_t  = dict.fromkeys(clfs, 0.0)
+    rng    = np.random.default_rng(params["random_state"])
+
+    def _X(df):
+        return _scaled(build_features(df, df_map, hv, num_cols)[0], scale)
+
+    for ep in range(max(epochs.values())):
+        with stage(f"stream: epoch {ep + 1}"):
+            for i, df in enumerate(chunks()):
+                tr = ~_is_test(len(df), i, params)
+                if not tr.any():
+                    continue
+                X, y  = _X(df[tr]), _labels(df)[tr]
+                order = rng.permutation(len(y))
+                X, y  = X[order], y[order]
+                for nm, clf in clfs.items():
+                    if ep < epochs[nm]:
+                        t = time.perf_counter()
+                        clf.partial_fit(X, y, classes=CLASSES, sample_weight=w[y])
+                        fit_t[nm] += time.perf_counter() - t
+
+    # held-out rows: predictions are kept (one float per row) for the table and plots
+    pred_t = dict.fromkeys(clfs, 0.0)
+    y_te, probs, preds = [], {nm: [] for nm in clfs}, {nm: [] for nm in clfs}
+    with stage("stream: evaluate"):
+        for i, df in enumerate(chunks()):
+            te = _is_test(len(df), i, params)
+            if not te.any():
+                continue
+            X = _X(df[te])
+            y_te.append(_labels(df)[te])
+            for nm, clf in clfs.items():
+                t = time.perf_counter()
+                probs[nm].append(clf.predict_proba(X)[:,1].astype(np.float32))
+                preds[nm].append(clf.predict(X))
+                pred_t[nm] += time.perf_counter() - t
+    y_te = np.concatenate(y_te) if y_te else np.empty(0, dtype=np.int64)
+
+    results, runs = {}, {}
+    for nm in clfs:
+        results[nm] = metric_row(y_te, np.concatenate(preds[nm]), np.concatenate(probs[nm]))
+        runs[nm]    = {"Status": "ok", "Time": fit_t[nm] + pred_t[nm], "Fit": fit_t[nm],
+                       "Predict": pred_t[nm]}
+    return {"vectorizer": hv, "num_cols": num_cols, "models": {nm: Scaled(c, scale) for nm, c in clfs.items()},
+            "results": results, "runs": runs, "y_te": y_te}
+
+
+def score_chunks(clf, chunks, df_map, vec, num_cols) -> np.ndarray:
+    # P(Recommend=Yes) for every row without building the full feature matrix
+    out = [clf.predict_proba(build_features(df, df_map, vec, num_cols)[0])[:,1].astype(np.float32)
+           for df in chunks()]
+    return np.concatenate(out) if out else np.empty(0, dtype=np.float32)
+
+
+# ─── CLI ───────────────────────────────────────────────────────────────────────
+def main(argv=None):
+    from ingest import file_digest
+    from model_registry import DEFAULT_ROOT, ModelRegistry, fingerprint
+    from score_batch import read_chunks, read_table
+
+    ap = argparse.ArgumentParser(description="Train the Recommend? classifiers out of core")
+    ap.add_argument("input", help="CSV or Parquet with id, Clean_rev and Label (or Recommend?)")
+    ap.add_argument("--ratings",    required=True, help="Overview_Reviews.xlsx/.csv/.parquet")
+    ap.add_argument("--registry",   default=DEFAULT_ROOT)
+    ap.add_argument("--chunk",      type=int, default=STREAM_PARAMS["chunk"])
+    ap.add_argument("--epochs",     type=int, default=STREAM_PARAMS["epochs"])
+    ap.add_argument("--n-features", type=int, default=STREAM_PARAMS["n_features"])
+    args = ap.parse_args(argv)
+
+    params = dict(STREAM_PARAMS, chunk=args.chunk, epochs=args.epochs, n_features=args.n_features)
+    cols   = ["id", "Clean_rev", "Label", "Recommend?"]
+    df_map = read_table(args.ratings)
+    chunks = lambda: (df.assign(Clean_rev=df["Clean_rev"].fillna(""))
+                      for df in read_chunks(args.input, params["chunk"], cols))
+
+    data_fp = hashlib.sha1((file_digest(args.input) + file_digest(args.ratings)).encode()).hexdigest()
+    key     = fingerprint(data_fp, {"stream": params}, STREAM_MODEL_PARAMS)
+    t0      = time.perf_counter()
+    bundle  = train_streaming(chunks, df_map, params)
+    ModelRegistry(args.registry).save(key, bundle, meta={
+        "features": {"stream": params}, "models": STREAM_MODEL_PARAMS, "runs": bundle["runs"],
+        "metrics":  {nm: {m: r[m] for m in METRICS} for nm, r in bundle["results"].items()},
+    })
+    print(pd.DataFrame({nm: {m: r[m] for m in METRICS} for nm, r in bundle["results"].items()}).T
+          .round(4).to_string(), file=sys.stderr)
+    print(f"trained in {time.perf_counter() - t0:.1f}s · registry key {key}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+# tests/test_embeddings.py — doc_embeddings vs the original per-token loop
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("scipy")
+
+from embeddings import doc_embeddings, weighted_matrix_loop
+
+
+class KV:
+    # minimal KeyedVectors: known words have rows; "ft_*" words are built on the fly (FastText OOV)
+    def __init__(self, words, dim=4, seed=0):
+        rng = np.random.default_rng(seed)
+        self.key_to_index = {w: i for i, w in enumerate(words)}
+        self.vectors      = rng.normal(size=(len(words), dim)).astype(np.float32)
+        self.vector_size  = dim
+
+    def __contains__(self, w):
+        return w in self.key_to_index or w.startswith("ft_")
+
+    def __getitem__(self, w):
+        if w in self.key_to_index:
+            return self.vectors[self.key_to_index[w]]
+        return np.full(self.vector_size, len(w) / 10, dtype=np.float32)
+
+
+class Model:
+    def __init__(self, kv):
+        self.wv, self.vector_size = kv, kv.vector_size
+
+
+VOCAB = {"good": 0, "pay": 1, "team": 2, "boss": 3}          # TF-IDF vocabulary
+IDF   = np.array([1.5, 2.0, 1.2, 3.0])
+MODEL = Model(KV(["good", "pay", "team", "office", "boss"]))
+
+DOCS = [
+    ["good", "pay", "good"],                # repeated word
+    [],                                     # empty doc
+    ["zzz", "qqq"],                         # OOV for the model only → zero vector
+    ["office", "team"],                     # "office" embedded but not in the TF-IDF vocab
+    ["ft_remote", "boss", "zzz"],           # FastText-style OOV word + unknown word
+    ["office"],                             # only TF-IDF-OOV words
+]
+
+
+def test_matches_loop_under_legacy_oov_rule():
+    want = weighted_matrix_loop(MODEL, DOCS, IDF, VOCAB)
+    got  = doc_embeddings(DOCS, MODEL, IDF, VOCAB, oov_idf=IDF[0])
+    assert got.shape == want.shape and got.dtype == np.float32
+    np.testing.assert_allclose(got, want, rtol=1e-5, atol=1e-6)
+
+
+def test_chunked_equals_unchunked():
+    full = doc_embeddings(DOCS, MODEL, IDF, VOCAB, oov_idf=IDF[0])
+    np.testing.assert_array_equal(doc_embeddings(DOCS, MODEL, IDF, VOCAB, oov_idf=IDF[0], chunk=2), full)
+
+
+def test_empty_and_unknown_docs_are_zero():
+    got = doc_embeddings([[], ["zzz"]], MODEL, IDF, VOCAB)
+    assert not got.any()
+    assert doc_embeddings([], MODEL, IDF, VOCAB).shape == (0, MODEL.vector_size)
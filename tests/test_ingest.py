@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+# tests/test_ingest.py — incremental re-ingest: deltas, state reuse, rev_grp
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("pyarrow")
+
+import ingest
+from text_clean import CleanStats
+
+
+class Clean:
+    # stand-in for clean_column: lower-cases, records what it was asked to clean,
+    # and reports texts containing "fail" as untranslated
+    def __init__(self):
+        self.seen = []
+
+    def __call__(self, s):
+        self.seen += s.tolist()
+        bad = s.index[s.str.contains("fail")].tolist()
+        return s.str.lower(), CleanStats(len(s), untranslated=bad)
+
+
+def companies(overview=None):
+    ov = {1: "Alpha builds apps", 2: "Beta sells chips", 3: "Gamma hosts servers", **(overview or {})}
+    return pd.DataFrame({"id": list(ov), "Company Name": [f"C{i}" for i in ov], "Company overview": list(ov.values())})
+
+
+def ratings(ids=(1, 2, 3), r=4.0):
+    return pd.DataFrame({"id": list(ids), "Rating": [r] * len(ids)})
+
+
+def reviews(rows):
+    return pd.DataFrame(rows, columns=["id", "What I liked", "Suggestions for improvement", "Recommend?"])
+
+
+BASE = [
+    (1, "Good pay", "More leave", "Yes"),
+    (1, "Nice team", "Less overtime", "Yes"),
+    (2, "Chips", "Better office", "No"),
+    (3, "Servers", "Remote work", "Yes"),
+]
+
+
+def write(tmp_path, tag, comp, rmap, rev):
+    d = tmp_path / "data" / tag
+    d.mkdir(parents=True)
+    paths = []
+    for name, df in (("comp", comp), ("map", rmap), ("rev", rev)):
+        p = d / f"{name}.parquet"
+        df.to_parquet(p, index=False)
+        paths.append(str(p))
+    return paths
+
+
+def load(paths, clean, root):
+    return ingest.incremental_load(*paths, clean, root=str(root))
+
+
+def test_first_load_is_full_and_reload_reads_state(tmp_path):
+    paths, root = write(tmp_path, "x", companies(), ratings(), reviews(BASE)), tmp_path / "ingest"
+    c1 = Clean()
+    _, _, df_rev, _, rep = load(paths, c1, root)
+    assert rep.full and len(c1.seen) == 3 + 4
+    assert df_rev["Clean_rev"].tolist()[0] == "good pay more leave"
+
+    c2 = Clean()
+    _, _, again, _, rep = load(paths, c2, root)
+    assert not rep.changed and c2.seen == []
+    assert again["Clean_rev"].tolist() == df_rev["Clean_rev"].tolist()
+
+
+def test_added_removed_changed_reviews(tmp_path):
+    root = tmp_path / "ingest"
+    load(write(tmp_path, "x", companies(), ratings(), reviews(BASE)), Clean(), root)
+
+    rows = [BASE[0], (1, "Nice team", "No overtime", "Yes"), BASE[3], (2, "New chips", "Gym", "Yes")]
+    c = Clean()
+    _, _, df_rev, _, rep = load(write(tmp_path, "y", companies(), ratings(), reviews(rows)), c, root)
+    assert (rep.rev_added, rep.rev_removed) == (2, 2)
+    assert sorted(c.seen) == ["New chips Gym", "Nice team No overtime"]
+    assert df_rev["Clean_rev"].tolist() == ["good pay more leave", "nice team no overtime",
+                                            "servers remote work", "new chips gym"]
+
+
+def test_duplicate_rows_are_counted_once_each(tmp_path):
+    root = tmp_path / "ingest"
+    load(write(tmp_path, "x", companies(), ratings(), reviews(BASE)), Clean(), root)
+
+    c = Clean()
+    _, _, df_rev, _, rep = load(write(tmp_path, "y", companies(), ratings(), reviews(BASE + [BASE[0]])), c, root)
+    assert (rep.rev_added, rep.rev_removed) == (1, 0)
+    assert c.seen == ["Good pay More leave"]
+    assert (df_rev["Clean_rev"] == "good pay more leave").sum() == 2
+
+    c = Clean()
+    _, _, _, _, rep = load(write(tmp_path, "z", companies(), ratings(), reviews(BASE[1:] + [BASE[0]])), c, root)
+    assert (rep.rev_added, rep.rev_removed) == (0, 1) and c.seen == []
+
+
+def test_changed_company_overview(tmp_path):
+    root = tmp_path / "ingest"
+    load(write(tmp_path, "x", companies(), ratings(), reviews(BASE)), Clean(), root)
+
+    c = Clean()
+    df_comp, _, _, _, rep = load(write(tmp_path, "y", companies({2: "Beta designs GPUs"}), ratings(),
+                                       reviews(BASE)), c, root)
+    assert (rep.comp_added, rep.comp_changed, rep.comp_removed) == (0, 1, 0)
+    assert c.seen == ["Beta designs GPUs"]
+    assert df_comp.set_index("id").at[2, "Clean_desc"] == "beta designs gpus"
+
+
+def test_switching_back_reuses_earlier_state(tmp_path):
+    root = tmp_path / "ingest"
+    x = write(tmp_path, "x", companies(), ratings(), reviews(BASE))
+    y = write(tmp_path, "y", companies(), ratings(), reviews([(4, "Other", "Data", "No")]))
+    load(x, Clean(), root)
+    load(y, Clean(), root)
+
+    c = Clean()
+    _, _, _, _, rep = load(x, c, root)
+    assert not rep.changed and c.seen == []
+
+
+def test_untranslated_rows_are_not_persisted(tmp_path):
+    root  = tmp_path / "ingest"
+    rows  = BASE + [(3, "fail to translate", "x", "No")]
+    paths = write(tmp_path, "x", companies(), ratings(), reviews(rows))
+    _, _, df_rev, stats, _ = load(paths, Clean(), root)
+    assert len(stats.untranslated) == 1
+    assert df_rev["Clean_rev"].iloc[-1] == "fail to translate x"
+
+    c = Clean()
+    _, _, df_rev, _, _ = load(paths, c, root)
+    assert c.seen == ["fail to translate x"]
+    assert df_rev["Clean_rev"].iloc[-1] == "fail to translate x"
+
+
+def test_rev_grp_matches_group_reviews(tmp_path):
+    sim_index = pytest.importorskip("sim_index")
+    root = tmp_path / "ingest"
+    load(write(tmp_path, "x", companies(), ratings(), reviews(BASE)), Clean(), root)
+
+    # company 1 reordered, 2 changed, 3 lost its reviews, 4 has no overview row
+    rows  = [BASE[1], BASE[0], (2, "New chips", "Gym", "Yes"), (4, "Orphan", "Review", "No")]
+    paths = write(tmp_path, "y", companies(), ratings(), reviews(rows))
+    df_comp, _, df_all, _, rep = ingest.load_all("A", *paths, Clean(), root=str(root))
+    assert not rep.full and not rep.ratings_changed
+    ids  = df_comp["id"]
+    grp  = ingest.load_rev_grp(str(root), tuple(map(ingest.file_digest, paths)))
+    want = sim_index.group_reviews(df_all, ids)
+    assert grp.reindex(ids).tolist() == want.tolist()
+
+
+def test_republishing_keeps_current_and_previous_version_only(tmp_path):
+    root  = tmp_path / "ingest"
+    paths = write(tmp_path, "x", companies(), ratings(), reviews(BASE + [(3, "fail to translate", "x", "No")]))
+    for _ in range(4):                         # incomplete state → rebuilt and republished each time
+        load(paths, Clean(), root)
+    key  = ingest._state_key(tuple(map(ingest.file_digest, paths)))
+    vers = [d for d in (root / "state").iterdir() if d.name.startswith(key + "-")]
+    assert len(vers) == 2
+    assert ingest._current_dir(str(root), key) in {str(v) for v in vers}
+
+
+def test_vanished_state_is_rebuilt(tmp_path):
+    import shutil
+    root  = tmp_path / "ingest"
+    paths = write(tmp_path, "x", companies(), ratings(), reviews(BASE))
+    load(paths, Clean(), root)
+    key = ingest._state_key(tuple(map(ingest.file_digest, paths)))
+    shutil.rmtree(ingest._current_dir(str(root), key))
+
+    c = Clean()
+    _, _, df_rev, _, rep = load(paths, c, root)
+    assert rep.full and len(c.seen) == 3 + 4
+    assert df_rev["Clean_rev"].tolist()[0] == "good pay more leave"
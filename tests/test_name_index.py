@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+# tests/test_name_index.py — NameIndex.rows vs the old str.contains row selection
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+np = pytest.importorskip("numpy")
+
+from name_index import NameIndex
+
+COMP = pd.DataFrame({
+    "id":           [10, 11, 12, 13, 14],
+    "Company Name": ["FPT Software", "NashTech", "Công ty Điện tử", "fpt telecom", "KMS Technology"],
+})
+# review rows in arbitrary order; id 99 has no company, 14 has no reviews
+REV_IDS = [11, 10, 13, 10, 99, 12, 11, 13, 10]
+
+
+def reference(q):
+    # the old Interactive lookup on the wide, per-review frame
+    names = pd.Series(REV_IDS).map(COMP.set_index("id")["Company Name"])
+    return np.flatnonzero(names.str.contains(q, case=False, regex=False, na=False).to_numpy())
+
+
+@pytest.fixture(scope="module")
+def index():
+    return NameIndex.from_frames(COMP, pd.DataFrame({"id": REV_IDS}))
+
+
+@pytest.mark.parametrize("q", [
+    "fpt", "FPT SOFT", "tech", "nash", "điện", "Công ty", "e",      # substrings, case, Vietnamese
+    "ft", "", "t",                                                  # shorter than a trigram
+    "kms", "samsung", "zz", "fpt  software", "a.b",                 # no reviews / unmatched / regex chars
+])
+def test_rows_match_str_contains(index, q):
+    np.testing.assert_array_equal(index.rows(q), reference(q))
+
+
+def test_compact_company_codes_give_same_rows():
+    codes = pd.Series(REV_IDS).map({cid: i for i, cid in enumerate(COMP["id"])}).fillna(-1).astype(int)
+    idx   = NameIndex.from_frames(COMP, pd.DataFrame({"id": REV_IDS, "comp": codes}))
+    for q in ("fpt", "tech", "zz"):
+        np.testing.assert_array_equal(idx.rows(q), reference(q))
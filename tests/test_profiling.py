@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+# tests/test_profiling.py — peak memory is measured per block, not per process
+
+from profiling import Profiler, measure
+
+
+def test_measure_sees_growth_inside_the_block():
+    with measure() as mem:
+        buf = b"x" * (64 << 20)
+    assert mem["peak_mb"] > 48
+    del buf
+
+
+def test_earlier_peak_does_not_leak_into_later_blocks():
+    buf = b"x" * (64 << 20)
+    del buf                                   # the process high-water mark is now ≥ 64 MB
+    with measure() as mem:
+        sum(range(1000))
+    assert mem["peak_mb"] < 16
+
+
+def test_measure_matches_profiler_stage():
+    prof = Profiler()
+    with prof.stage("alloc") as rec, measure() as mem:
+        buf = b"x" * (32 << 20)
+    del buf
+    assert abs(rec["peak_mb"] - mem["peak_mb"]) < 8
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+# tests/test_run_bench.py — baseline comparison counts crashed and vanished stages
+
+import pytest
+
+pytest.importorskip("pandas")
+
+from benchmarks.run_bench import compare
+
+
+def rec(stage, wall_s, status="ok", parent=None, size=1000):
+    return {"stage": stage, "parent": parent, "size": size, "wall_s": wall_s, "status": status}
+
+
+BASE = {"results": [
+    rec("similarity: build_index", 1.0),
+    rec("similarity: w2v query", 1.0),
+    rec("sim: tfidf", 0.5, parent="similarity: build_index"),
+    rec("spark (cold)", 2.0),
+    rec("spark (cold)", 2.0, size=10_000),
+]}
+
+
+def test_unchanged_run_has_no_regressions():
+    assert compare(BASE["results"], BASE, 0.2) == 0
+
+
+def test_slower_stage_is_a_regression():
+    now = [rec("spark (cold)", 3.0)]
+    assert compare(now, BASE, 0.2) == 1
+
+
+def test_errored_and_missing_stages_are_regressions():
+    # build_index crashed: it and its nested tfidf stage are gone, the w2v query never ran
+    now = [rec("similarity: build_index", 0.1, status="error: ValueError()"), rec("spark (cold)", 2.0)]
+    assert compare(now, BASE, 0.2) == 3
+
+
+def test_stages_outside_this_run_are_ignored():
+    # only spark at size 1000 was run: similarity and size 10_000 are not judged
+    assert compare([rec("spark (cold)", 2.0)], BASE, 0.2) == 0
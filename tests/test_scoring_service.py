@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+# tests/test_scoring_service.py — malformed items are rejected before batching
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("pandas")
+
+from scoring_service import Service
+
+
+class Sim:
+    pos  = {12: 0, 13: 1}
+    mats = {"rev_tfidf": None}
+
+
+class Scorer:
+    model_name, key, sim = "LR", "k", Sim()
+
+    def score_reviews(self, items):
+        return [0.5] * len(items)
+
+    def similar_companies(self, items):
+        return [[] for _ in items]
+
+
+def route(path, body):
+    async def _go():
+        svc = Service(Scorer())
+        for b in svc.batchers.values():
+            b.start()
+        return await svc.route("POST", path, body)
+    return asyncio.run(_go())
+
+
+@pytest.mark.parametrize("body", [
+    [1, 2],
+    {"reviews": "text"},
+    {"reviews": [{"id": 1, "text": "ok"}, "not a review"]},
+    {"reviews": [{"id": 1, "clean": 42}]},
+    {"reviews": [{"id": 1, "text": ["a"]}]},
+    {"reviews": [{"id": [1], "text": "a"}]},
+])
+def test_bad_reviews_are_400(body):
+    assert route("/score_reviews", body)[0] == 400
+
+
+def test_good_reviews_are_scored():
+    code, obj = route("/score_reviews", {"reviews": [{"id": 1, "text": "a"}, {"id": 2, "clean": "b"}]})
+    assert code == 200 and obj["probs"] == [0.5, 0.5]
+
+
+@pytest.mark.parametrize("q", [
+    {"id": 99}, {"id": [12]}, {"id": 12, "method": "nope"}, {"id": 12, "method": ["rev_tfidf"]},
+    {"id": 12, "k": "abc"}, {"id": 12, "k": -1}, {"id": 12, "k": 0}, {"id": 12, "k": 2.5}, {"id": 12, "k": True},
+])
+def test_bad_queries_are_400(q):
+    assert route("/similar_companies", {"queries": [{"id": 13}, q]})[0] == 400
+
+
+def test_good_queries_are_answered():
+    code, obj = route("/similar_companies", {"queries": [{"id": 12, "k": 3}, {"id": 13}]})
+    assert code == 200 and obj["results"] == [[], []]
@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+# tests/test_sim_index.py — top-k selection, in place and chunked
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("sklearn")
+
+from sim_index import topk_rows
+
+
+def reference(S, k, exclude):
+    S = np.array(S, dtype=np.float32)
+    S[np.arange(len(S)), exclude] = -np.inf
+    idx = np.argsort(-S, axis=1, kind="stable")[:, :k]
+    return idx, np.take_along_axis(S, idx, axis=1)
+
+
+@pytest.mark.parametrize("copy", [True, False])
+def test_topk_rows_matches_full_sort(copy):
+    rng = np.random.default_rng(0)
+    S   = rng.random((7, 30)).astype(np.float32)
+    ex  = rng.integers(0, 30, size=7)
+    want_idx, want_sc = reference(S, 5, ex)
+    keep = S.copy()
+    idx, sc = topk_rows(S, 5, exclude=ex, copy=copy)
+    np.testing.assert_array_equal(idx, want_idx)
+    np.testing.assert_array_equal(sc, want_sc)
+    if copy:
+        np.testing.assert_array_equal(S, keep)          # caller's scores untouched
+
+
+def test_topk_rows_k_larger_than_row():
+    idx, sc = topk_rows(np.eye(3, dtype=np.float32), 10, exclude=np.arange(3))
+    assert idx.shape == (3, 2) and (sc == 0).all()
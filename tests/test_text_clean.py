@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+# tests/test_text_clean.py — clean_series matches the old per-row clean_text
+
+import re, unicodedata
+
+import pytest
+
+pd     = pytest.importorskip("pandas")
+regex  = pytest.importorskip("regex")
+
+from text_clean import KEEP_POS, VIET_REGEX, clean_series
+
+STOP = frozenset({"the", "and", "is", "very"})
+TR   = {"Lương tốt, sếp vui vẻ!": "Good salary, the boss is cheerful!",
+        "Môi trường: 10/10 tuyệt vời": "Environment: 10/10 wonderful"}
+
+CORPUS = [
+    "Lương tốt, sếp vui vẻ!",
+    "Great team & flexible hours...",
+    "Great team & flexible hours...",
+    float("nan"),
+    None,
+    "",
+    "  Café naïve résumé  ",
+    "có lỗi dịch",                              # translation fails → cleaned as-is
+    "Môi trường: 10/10 tuyệt vời",
+    "The salary is VERY good; OT-free (mostly)",
+]
+
+
+class Tok:
+    def __init__(self, text, pos):
+        self.text, self.pos_ = text, pos
+
+
+class FakeNLP:
+    # deterministic stand-in for spaCy: long words are nouns, short ones are not
+    def __call__(self, s):
+        return [Tok(w, "NOUN" if len(w) > 3 else "ADP") for w in s.split()]
+
+    def pipe(self, texts, batch_size=1000, n_process=1):
+        return map(self, texts)
+
+
+class Translator:
+    def translate(self, s):
+        if s not in TR:
+            raise RuntimeError("translation failed")
+        return TR[s]
+
+
+def baseline_clean_text(txt, nlp, sw, translator):
+    # the per-row function the app used before clean_series (applied after fillna(""))
+    s = str(txt).strip()
+    if VIET_REGEX.search(s):
+        try: s = translator.translate(s)
+        except: pass
+    s = unicodedata.normalize("NFD", s)
+    s = regex.sub(r"\p{Mn}", "", s)
+    s = re.sub(r"[^A-Za-z\s]", " ", s).lower()
+    toks = [w for w in re.findall(r"\b\w\w+\b", s) if w not in sw]
+    doc  = nlp(" ".join(toks))
+    return " ".join(tok.text for tok in doc if tok.pos_ in KEEP_POS)
+
+
+def batch_translate(texts):
+    return [TR.get(s) for s in texts]                  # None marks a failed text
+
+
+def nlps():
+    yield FakeNLP()
+    try:
+        import spacy
+        yield spacy.load("en_core_web_sm", disable=["parser", "ner"])
+    except (ImportError, OSError):
+        pass
+
+
+@pytest.mark.parametrize("nlp", list(nlps()), ids=lambda n: type(n).__name__)
+def test_clean_series_matches_per_row_baseline(nlp):
+    texts = pd.Series(CORPUS, dtype=object)
+    want  = texts.fillna("").map(lambda t: baseline_clean_text(t, nlp, STOP, Translator())).tolist()
+    got, stats = clean_series(texts, nlp, STOP, translate=batch_translate)
+    assert got.tolist() == want
+    assert stats.n_docs == len(CORPUS) and stats.n_unique < len(CORPUS)
+    assert stats.untranslated == [i for i, t in enumerate(CORPUS)
+                                  if isinstance(t, str) and VIET_REGEX.search(t) and t.strip() not in TR]
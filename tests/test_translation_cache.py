@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+# tests/test_translation_cache.py — cache keys, identity answers, batch failures
+
+from translation_cache import OfflineBackend, TranslationCache, translate_many
+
+
+class Flaky:
+    # fails any batch containing "bad"; otherwise upper-cases
+    name = "flaky"
+
+    def __init__(self):
+        self.calls = []
+
+    def translate(self, texts):
+        self.calls.append(list(texts))
+        if "bad" in texts:
+            raise RuntimeError("boom")
+        return [s.upper() for s in texts]
+
+
+def test_offline_identity_does_not_answer_other_backends():
+    cache = TranslationCache(":memory:")
+    out, _ = translate_many(["xin chào"], cache, OfflineBackend())
+    assert out == ["xin chào"] and len(cache) == 1
+
+    fl = Flaky()
+    out, stats = translate_many(["xin chào"], cache, fl)
+    assert out == ["XIN CHÀO"] and stats.misses == 1 and fl.calls
+
+
+def test_unchanged_answers_are_cached():
+    # e.g. an English review with a Vietnamese name: the backend returns it as is
+    cache, fl = TranslationCache(":memory:"), Flaky()
+    translate_many(["CHÀO"], cache, fl)
+    out, stats = translate_many(["CHÀO"], cache, fl)
+    assert out == ["CHÀO"] and (stats.hits, stats.misses) == (1, 0) and len(fl.calls) == 1
+
+
+def test_backends_do_not_share_entries():
+    cache = TranslationCache(":memory:")
+    translate_many(["a"], cache, OfflineBackend({"a": "offline-a"}))
+    out, stats = translate_many(["a"], cache, Flaky())
+    assert out == ["A"] and stats.hits == 0
+
+
+def test_failed_batch_retried_per_text():
+    cache = TranslationCache(":memory:")
+    out, stats = translate_many(["x", "bad", "y"], cache, Flaky(), batch_size=8, retries=0, backoff=0)
+    assert out == ["X", "bad", "Y"]
+    assert stats.failed == 1 and len(cache) == 2
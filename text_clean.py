@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+# text_clean.py — batched, column-wise version of the old per-row clean_text
+
+import re, sys, time, unicodedata
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+import pandas as pd
+
+from profiling import stage
+
+VIET_REGEX = re.compile(r"[àáảãạăắằẳẵặâấầẩẫậđèéẻẽẹêếềểễệìíỉĩịòóỏõọôốồổỗơớờởỡợùúủũụưứừửữựỳỷỹự]", re.IGNORECASE)
+KEEP_POS   = {"NOUN", "VERB", "ADJ", "ADV"}
+
+
+def load_nlp(model="en_core_web_sm"):
+    # never downloads: a missing model is an installation problem, not a runtime step
+    import spacy
+    try:
+        return spacy.load(model, disable=["parser", "ner"])
+    except OSError as e:
+        raise OSError(f"spaCy model {model!r} is not installed; run: python -m spacy download {model}") from e
+
+
+def stop_words():
+    from spacy.lang.en.stop_words import STOP_WORDS
+    return STOP_WORDS
+
+
+@lru_cache(maxsize=1)
+def _mn_table():
+    # str.translate table dropping every \p{Mn} code point (same set as regex.sub(r"\p{Mn}", ...))
+    return {cp: None for cp in range(sys.maxunicode + 1) if unicodedata.category(chr(cp)) == "Mn"}
+
+
+def normalize_series(s: pd.Series, stop_words) -> pd.Series:
+    s = s.str.normalize("NFD").str.translate(_mn_table())
+    s = s.str.replace(r"[^A-Za-z\s]", " ", regex=True).str.lower()
+    return s.str.findall(r"\b\w\w+\b").map(lambda ts: " ".join(w for w in ts if w not in stop_words))
+
+
+@dataclass
+class CleanStats:
+    n_docs:   int   = 0
+    n_unique: int   = 0
+    n_viet:   int   = 0
+    seconds:  float = 0.0
+    untranslated: list = field(default_factory=list)   # index labels cleaned from untranslated text
+
+    @property
+    def docs_per_sec(self) -> float:
+        return self.n_docs / self.seconds if self.seconds > 0 else 0.0
+
+    def __add__(self, other):
+        return CleanStats(self.n_docs + other.n_docs, self.n_unique + other.n_unique,
+                          self.n_viet + other.n_viet, self.seconds + other.seconds,
+                          self.untranslated + other.untranslated)
+
+
+def clean_series(texts, nlp, stop_words, translate=None, batch_size=1000, n_process=1):
+    """Clean a whole column; output matches the old clean_text applied row by row.
+
+    translate(list) -> list may return None for a text it could not translate; that
+    text is cleaned as-is and its rows are listed in stats.untranslated.
+    """
+    t0 = time.perf_counter()
+    s  = pd.Series(texts, dtype=object).fillna("").astype(str).str.strip()
+
+    # identical texts are cleaned once (the old st.cache_data memo did the same per row)
+    uniq = pd.Series(pd.unique(s), dtype=object)
+    viet = uniq.map(VIET_REGEX.search).notna()
+    src  = uniq.copy()
+    bad  = []
+    if translate is not None and viet.any():
+        tr = pd.Series(translate(uniq[viet].tolist()), index=uniq.index[viet], dtype=object)
+        src[viet] = tr.where(tr.notna(), uniq[viet])
+        bad = uniq[viet][tr.isna()].tolist()
+
+    with stage("clean: spacy", docs=len(uniq)):
+        norm = normalize_series(src, stop_words)
+        docs = nlp.pipe(norm.tolist(), batch_size=batch_size, n_process=n_process)
+        out  = [" ".join(tok.text for tok in doc if tok.pos_ in KEEP_POS) for doc in docs]
+
+    res = s.map(pd.Series(out, index=uniq.values, dtype=object))
+    if isinstance(texts, pd.Series):
+        res.index = texts.index
+    stats = CleanStats(len(s), len(uniq), int(viet.sum()), time.perf_counter() - t0,
+                       res.index[s.isin(bad).to_numpy()].tolist() if bad else [])
+    return res, stats
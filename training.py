@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+# training.py — scikit-learn / XGBoost model zoo for the Recommendation page
+
+import multiprocessing as mp
+import os, time, traceback
+from multiprocessing.connection import wait
+
+import numpy as np
+from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, roc_auc_score
+
+from profiling import measure
+
+MODEL_PARAMS = {
+    "LR":  dict(class_weight="balanced", max_iter=500),
+    "RF":  dict(class_weight="balanced"),
+    "SVM": dict(probability=True, class_weight="balanced"),
+    "XGB": dict(use_label_encoder=False, eval_metric="logloss"),
+}
+# drop-in faster variants: linear SVM + sigmoid calibration, histogram XGBoost
+FAST_MODEL_PARAMS = {
+    "LR":       MODEL_PARAMS["LR"],
+    "RF":       MODEL_PARAMS["RF"],
+    "SVM-lin":  dict(class_weight="balanced", cv=3),
+    "XGB-hist": dict(eval_metric="logloss", tree_method="hist"),
+}
+METRICS      = ["Acc", "Prec", "Rec", "F1", "AUC"]
+TIME_BUDGET  = 600.0      # seconds per model in the process pool
+
+
+def make_model(name, params=None, n_threads=None):
+    params = dict({**MODEL_PARAMS, **FAST_MODEL_PARAMS}[name] if params is None else params)
+    kind   = name.split("-")[0]
+    if kind == "LR":
+        from sklearn.linear_model import LogisticRegression
+        return LogisticRegression(**params)
+    if kind == "RF":
+        from sklearn.ensemble import RandomForestClassifier
+        if n_threads: params.setdefault("n_jobs", n_threads)
+        return RandomForestClassifier(**params)
+    if name == "SVM":
+        from sklearn.svm import SVC
+        return SVC(**params)
+    if name == "SVM-lin":
+        from sklearn.calibration import CalibratedClassifierCV
+        from sklearn.svm import LinearSVC
+        cv = params.pop("cv", 3)
+        return CalibratedClassifierCV(LinearSVC(**params), cv=cv, method="sigmoid",
+                                      n_jobs=min(cv, n_threads) if n_threads else None)
+    if kind == "XGB":
+        from xgboost import XGBClassifier
+        if n_threads: params.setdefault("n_jobs", n_threads)
+        return XGBClassifier(**params)
+    raise ValueError(f"unknown model: {name!r}")
+
+
+def evaluate(clf, X_te, y_te):
+    return metric_row(y_te, clf.predict(X_te), clf.predict_proba(X_te)[:,1])
+
+
+def metric_row(y_te, p, prob):
+    # the Acc/Prec/Rec/F1/AUC row shown on the Recommendation page (+ pred/prob for the plots)
+    return {
+        "pred": p,
+        "prob": prob,
+        "Acc":  accuracy_score(y_te, p),
+        "Prec": precision_score(y_te, p, zero_division=0),
+        "Rec":  recall_score(y_te, p, zero_division=0),
+        "F1":   f1_score(y_te, p, zero_division=0),
+        "AUC":  roc_auc_score(y_te, prob)
+    }
+
+
+def _fit_one(name, kw, n_threads, X_res, y_res, X_te, y_te):
+    # sampled only while fitting/predicting: the args are already unpickled here
+    with measure() as mem:
+        t0  = time.perf_counter()
+        clf = make_model(name, kw, n_threads)
+        clf.fit(X_res, y_res)
+        t1  = time.perf_counter()
+        res = evaluate(clf, X_te, y_te)
+        t2  = time.perf_counter()
+    return clf, res, {"Status": "ok", "Time": t2 - t0, "Fit": t1 - t0, "Predict": t2 - t1,
+                      "PeakMB": mem["peak_mb"]}
+
+
+def _fit_worker(conn, *args):
+    try:
+        conn.send(_fit_one(*args))
+    except BaseException:
+        conn.send(traceback.format_exc())
+    finally:
+        conn.close()
+
+
+def train_sk_models(X_res, y_res, X_te, y_te, params=MODEL_PARAMS,
+                    max_workers=None, time_budget=TIME_BUDGET, n_cpus=None):
+    """Fit every model in params → (fitted models, results, per-model run info).
+
+    Models run concurrently in separate processes (one per model, at most
+    max_workers at a time); each gets n_cpus // max_workers threads for its own
+    n_jobs so the machine is not oversubscribed. A model still running after
+    time_budget seconds is terminated and reported as "timeout".
+    max_workers=1 fits in-process, without a budget.
+    """
+    n_cpus      = n_cpus or os.cpu_count() or 1
+    max_workers = max(1, min(max_workers or n_cpus, len(params)))
+    n_threads   = max(1, n_cpus // max_workers)
+    fitted, results, runs = {}, {}, {}
+
+    if max_workers == 1:
+        for name, kw in params.items():
+            fitted[name], results[name], runs[name] = _fit_one(name, kw, n_threads, X_res, y_res, X_te, y_te)
+        return fitted, results, runs
+
+    ctx     = mp.get_context("spawn")
+    pending = list(params.items())
+    running = {}                                    # conn → (name, process, start)
+    while pending or running:
+        while pending and len(running) < max_workers:
+            name, kw = pending.pop(0)
+            rx, tx = ctx.Pipe(duplex=False)
+            proc = ctx.Process(target=_fit_worker, daemon=True,
+                               args=(tx, name, kw, n_threads, X_res, y_res, X_te, y_te))
+            proc.start(); tx.close()
+            running[rx] = (name, proc, time.perf_counter())
+
+        now     = time.perf_counter()
+        timeout = None
+        if time_budget:
+            timeout = max(0.0, min(st + time_budget for _, _, st in running.values()) - now)
+        for rx in wait(list(running), timeout=timeout):
+            name, proc, st = running.pop(rx)
+            try:
+                out = rx.recv()
+            except EOFError:
+                out = f"worker exited with code {proc.exitcode}"
+            proc.join()
+            if isinstance(out, str):
+                runs[name] = {"Status": "error", "Time": time.perf_counter() - st, "PeakMB": None, "Error": out}
+            else:
+                fitted[name], results[name], runs[name] = out
+
+        if time_budget:
+            now = time.perf_counter()
+            for rx, (name, proc, st) in list(running.items()):
+                if now - st >= time_budget:
+                    proc.terminate(); proc.join()
+                    running.pop(rx); rx.close()
+                    runs[name] = {"Status": "timeout", "Time": now - st, "PeakMB": None}
+
+    # keep the caller's model order
+    order = [n for n in params if n in runs]
+    return ({n: fitted[n] for n in order if n in fitted},
+            {n: results[n] for n in order if n in results},
+            {n: runs[n] for n in order})
+
+
+def score_all(clf, X, chunk=50_000):
+    # P(Recommend=Yes) for every row, as a compact float32 array
+    out = np.empty(X.shape[0], dtype=np.float32)
+    for a in range(0, X.shape[0], chunk):
+        out[a:a+chunk] = clf.predict_proba(X[a:a+chunk])[:,1]
+    return out
+
+
+def best_model(results, metric="Acc"):
+    # None when no model finished (all timed out / errored)
+    if not results:
+        return None
+    return max(results.items(), key=lambda x: x[1][metric])[0]
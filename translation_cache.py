@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+# translation_cache.py — persistent Vi→En translation store + batched translator
+
+import hashlib, logging, os, sqlite3, threading, time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from profiling import stage
+
+log = logging.getLogger(__name__)
+
+DEFAULT_PATH = os.path.join(".cache", "translations.sqlite")
+
+
+def text_key(s: str, target="en", backend="") -> str:
+    # backend is part of the key: an offline run must never answer a Google lookup
+    return hashlib.sha1(f"{backend}\x00{target}\x00{s}".encode("utf-8")).hexdigest()
+
+
+@dataclass
+class TranslateStats:
+    hits:   int = 0
+    misses: int = 0
+    failed: int = 0
+
+    def __add__(self, other):
+        return TranslateStats(self.hits + other.hits, self.misses + other.misses, self.failed + other.failed)
+
+
+# ─── Store ─────────────────────────────────────────────────────────────────────
+class TranslationCache:
+    def __init__(self, path=DEFAULT_PATH):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path  = path
+        self.lock  = threading.Lock()
+        self.conn  = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS tr (key TEXT PRIMARY KEY, dst TEXT NOT NULL)")
+        self.conn.commit()
+        self.stats = TranslateStats()
+
+    def get_many(self, keys, chunk=500) -> dict:
+        out = {}
+        with self.lock:
+            for i in range(0, len(keys), chunk):
+                part = keys[i:i+chunk]
+                q    = "SELECT key, dst FROM tr WHERE key IN (%s)" % ",".join("?" * len(part))
+                out.update(self.conn.execute(q, part).fetchall())
+        return out
+
+    def put_many(self, items):
+        with self.lock:
+            self.conn.executemany("INSERT OR REPLACE INTO tr (key, dst) VALUES (?, ?)", items)
+            self.conn.commit()
+
+    def __len__(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM tr").fetchone()[0]
+
+    def close(self):
+        self.conn.close()
+
+
+# ─── Backends ──────────────────────────────────────────────────────────────────
+# A backend is anything with translate(list[str]) -> list[str]; it may raise on failure.
+class GoogleBackend:
+    name = "google"
+
+    def __init__(self, source="auto", target="en"):
+        self.source, self.target = source, target
+        self._local = threading.local()
+
+    def _tr(self):
+        if not hasattr(self._local, "tr"):
+            from deep_translator import GoogleTranslator
+            self._local.tr = GoogleTranslator(source=self.source, target=self.target)
+        return self._local.tr
+
+    def translate(self, texts):
+        tr = self._tr()
+        return [tr.translate(s) for s in texts]
+
+
+class OfflineBackend:
+    # No network: looks texts up in an optional dict, otherwise returns them unchanged.
+    name = "offline"
+
+    def __init__(self, mapping=None):
+        self.mapping = dict(mapping or {})
+
+    def translate(self, texts):
+        return [self.mapping.get(s, s) for s in texts]
+
+
+def make_backend(name=None):
+    name = name or os.environ.get("ITVIEC_TRANSLATOR", "google")
+    if name == "offline":
+        return OfflineBackend()
+    if name == "google":
+        return GoogleBackend()
+    raise ValueError(f"unknown translator backend: {name!r}")
+
+
+# ─── Batched translation ───────────────────────────────────────────────────────
+def _with_retries(backend, batch, retries, backoff):
+    for attempt in range(retries + 1):
+        try:
+            res = backend.translate(batch)
+            if len(res) != len(batch):
+                raise ValueError("backend returned %d results for %d texts" % (len(res), len(batch)))
+            return res
+        except Exception as e:
+            if attempt == retries:
+                log.warning("translation batch of %d failed after %d tries: %s", len(batch), attempt + 1, e)
+                return None
+            time.sleep(backoff * 2 ** attempt)
+
+
+def translate_many(texts, cache, backend, target="en", batch_size=32, max_workers=4,
+                   retries=2, backoff=0.5, keep_source=True):
+    """Translate texts through the cache; only unique misses reach the backend.
+
+    Failed texts come back unchanged, or as None with keep_source=False.
+    """
+    texts = list(texts)
+    with stage("translate", texts=len(texts)) as rec:
+        out, stats = _translate_many(texts, cache, backend, target, batch_size, max_workers, retries, backoff,
+                                     keep_source)
+        rec.update(hits=stats.hits, misses=stats.misses, failed=stats.failed)
+    return out, stats
+
+
+def _translate_many(texts, cache, backend, target, batch_size, max_workers, retries, backoff, keep_source):
+    name  = getattr(backend, "name", type(backend).__name__)
+    keys  = [text_key(s, target, name) for s in texts]
+    uniq  = dict(zip(keys, texts))
+    found = cache.get_many(list(uniq))
+    miss  = [k for k in uniq if k not in found]
+    stats = TranslateStats(hits=len(uniq) - len(miss), misses=len(miss))
+
+    if miss:
+        batches = [miss[i:i+batch_size] for i in range(0, len(miss), batch_size)]
+        def _run(ks):
+            res = _with_retries(backend, [uniq[k] for k in ks], retries, backoff)
+            if res is None and len(ks) > 1:
+                # one bad text shouldn't sink its batch: retry the texts one at a time
+                res = [(_with_retries(backend, [uniq[k]], 0, backoff) or [None])[0] for k in ks]
+            return ks, res
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(batches)))) as ex:
+            for ks, res in ex.map(_run, batches):
+                if res is None:
+                    stats.failed += len(ks)
+                    continue
+                rows = [(k, r) for k, r in zip(ks, res) if isinstance(r, str)]
+                stats.failed += len(ks) - len(rows)
+                cache.put_many(rows)
+                found.update(rows)
+
+    cache.stats = cache.stats + stats
+    # failed texts are not stored, so they are retried on the next run
+    return [found.get(k, s if keep_source else None) for k, s in zip(keys, texts)], stats
+
+
+def cached_translator(cache, backend, **kw):
+    # adapter for text_clean.clean_series(translate=...); None marks a failed text
+    def _tr(texts):
+        return translate_many(texts, cache, backend, keep_source=False, **kw)[0]
+    return _tr